@@ -0,0 +1,4 @@
+'''
+Headless benchmarks for the game's hot paths.
+Run from the repository root with `python -m benchmarks.run`.
+'''
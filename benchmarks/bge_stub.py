@@ -0,0 +1,114 @@
+from __future__ import annotations
+import os
+import sys
+import types
+from typing import TYPE_CHECKING, Any
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+
+'''
+Minimal stand-in for the parts of UPBGE's bge module (and the bpy objects reached through
+blenderObject) that the controllers use, so they can be imported and timed on a plain Python.
+NumPy is imported on first use so that installing the stub does not skew import-time reports.
+'''
+
+class FakeParticles:
+    """Particle collection supporting len() and bulk foreach_get/foreach_set of "location"."""
+
+    def __init__(self, count: int):
+        import numpy as np
+        self.locations: NDArray[np.float32] = np.zeros((count, 3), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def foreach_get(self, attribute: str, buffer: NDArray[np.float32]) -> None:
+        assert attribute == "location"
+        buffer[:] = self.locations.ravel()
+
+    def foreach_set(self, attribute: str, buffer: NDArray[np.float32]) -> None:
+        import numpy as np
+        assert attribute == "location"
+        self.locations[:] = np.asarray(buffer, dtype=np.float32).reshape(-1, 3)
+
+class FakeParticleSystem:
+    def __init__(self, count: int):
+        self.particles = FakeParticles(count)
+
+class FakeMaterial:
+    def __init__(self):
+        self.diffuse_color = (1.0, 1.0, 1.0, 1.0)
+
+class FakeTextData:
+    def __init__(self):
+        self.body = ""
+
+class FakeBlenderObject:
+    """The bpy object behind a game object: particles, material, transform and text body."""
+
+    def __init__(self, num_particles: int = 0):
+        self.particle_systems = [FakeParticleSystem(num_particles)]
+        self.active_material = FakeMaterial()
+        self.scale = (1.0, 1.0, 1.0)
+        self.rotation_euler = (0.0, 0.0, 0.0)
+        self.data = FakeTextData()
+
+class FakeGameObject(dict):
+    """A KX_GameObject: game properties through the dict interface plus blenderObject."""
+
+    def __init__(self, num_particles: int = 0, **properties: Any):
+        super().__init__(properties)
+        self.blenderObject = FakeBlenderObject(num_particles)
+
+class FakeController:
+    def __init__(self, owner: FakeGameObject):
+        self.owner = owner
+
+class FakeLogic(types.ModuleType):
+    """bge.logic: a globalDict and the controller that is currently running."""
+
+    def __init__(self):
+        super().__init__("bge.logic")
+        self.globalDict: dict[str, Any] = {}
+        self.controller: FakeController | None = None
+
+    def getCurrentController(self) -> FakeController:
+        if self.controller is None:
+            self.controller = FakeController(FakeGameObject())
+        return self.controller
+
+    def set_owner(self, owner: FakeGameObject) -> None:
+        self.controller = FakeController(owner)
+
+    def expandPath(self, path: str) -> str:
+        """Resolve a blend-relative "//" path against the repository root, where game.blend lives."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(root, path[2:]) if path.startswith("//") else path
+
+class FakeRender(types.ModuleType):
+    def __init__(self):
+        super().__init__("bge.render")
+
+    def showMouse(self, visible: bool) -> None:
+        pass
+
+def install() -> FakeLogic:
+    """Register the stub as the bge module and return its logic submodule.
+
+    Returns:
+        FakeLogic: The stand-in for bge.logic.
+    """
+    if "bge" in sys.modules and isinstance(getattr(sys.modules["bge"], "logic", None), FakeLogic):
+        return sys.modules["bge"].logic
+
+    bge = types.ModuleType("bge")
+    logic = FakeLogic()
+    render = FakeRender()
+    bge.logic = logic # type: ignore
+    bge.render = render # type: ignore
+
+    sys.modules["bge"] = bge
+    sys.modules["bge.logic"] = logic
+    sys.modules["bge.render"] = render
+    return logic
@@ -0,0 +1,108 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+'''
+Measures how long each controller module takes to import in a fresh interpreter.
+
+    python -m benchmarks.import_times --repeats 5 --output imports.json
+
+Every module is imported with `python -X importtime` (after installing the bge stand-in),
+so the report shows the cold cost the first frame or a scene switch pays, and which
+top-level packages it comes from.
+'''
+
+controller_modules = [
+    "scripts.controllers.gate_buttons",
+    "scripts.controllers.mouse",
+    "scripts.controllers.orbital",
+    "scripts.controllers.orbital_buttons",
+    "scripts.controllers.profiling",
+    "scripts.controllers.quantum_text",
+    "scripts.controllers.qubits",
+    "scripts.controllers.state_vector",
+]
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Parse the lines written by -X importtime.
+
+    Args:
+        stderr (str): Standard error of the interpreter.
+
+    Returns:
+        list: (module name, self time, cumulative time) per imported module, times in microseconds.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        if not self_time.strip().isdigit():
+            continue  # Header line
+        entries.append((name.strip(), int(self_time), int(cumulative)))
+    return entries
+
+def measure(module: str) -> tuple[float, dict[str, float]]:
+    """Import a module in a fresh interpreter.
+
+    Args:
+        module (str): Dotted module name.
+
+    Returns:
+        tuple: (cumulative import time of the module in ms, self time in ms per top-level package).
+    """
+    code = f"from benchmarks.bge_stub import install; install(); import {module}"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    entries = parse_importtime(result.stderr)
+    total = next(cumulative for name, _, cumulative in entries if name == module)
+
+    packages: dict[str, float] = defaultdict(float)
+    for name, self_time, _ in entries:
+        if not name.startswith("benchmarks"):
+            packages[name.split(".")[0]] += self_time / 1000
+
+    return total / 1000, dict(packages)
+
+def report(modules: list[str], repeats: int) -> dict[str, dict]:
+    """Median import cost of each module over several fresh interpreters.
+
+    Returns:
+        dict: Per module, "total_ms" and the five most expensive top-level packages ("packages_ms").
+    """
+    results = {}
+    for module in modules:
+        runs = [measure(module) for _ in range(repeats)]
+        packages = {name: statistics.median(run[1].get(name, 0.0) for run in runs) for name in runs[0][1]}
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:5]
+        results[module] = {
+            "total_ms": statistics.median(run[0] for run in runs),
+            "packages_ms": dict(heaviest)
+        }
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report cold import times of the controller modules.")
+    parser.add_argument("modules", nargs="*", default=controller_modules, help="Modules to measure.")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per module.")
+    parser.add_argument("--output", default=None, help="Optional JSON report path.")
+    args = parser.parse_args()
+
+    results = report(args.modules, args.repeats)
+
+    for module, result in results.items():
+        packages = ", ".join(f"{name} {ms:.1f}" for name, ms in result["packages_ms"].items())
+        print(f"{result['total_ms']:8.1f} ms  {module}  ({packages})")
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
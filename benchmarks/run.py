@@ -0,0 +1,229 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable
+import numpy as np
+from benchmarks.bge_stub import FakeGameObject, install
+
+logic = install()
+
+from scripts.global_manager import GlobalConstants, GlobalStorage
+from scripts.wavefunction import a, wavefunction_superposition_multiple
+from scripts.sampling import inverse_cdf_sample, sample_orbital
+from scripts.background import BackgroundSampler
+from scripts.circuit import Circuit, read_state
+from scripts.state_backend import SparseBackend
+from scripts.controllers import gate_buttons, orbital, qubits
+
+'''
+Times the game's hot paths outside UPBGE and compares them against a saved report.
+
+    python -m benchmarks.run --output report.json
+    python -m benchmarks.run --baseline report.json --threshold 0.25
+
+Exits with status 1 if any benchmark is slower than the baseline by more than the threshold.
+'''
+
+# Valid orbitals, in the order they are added to the benchmarked superpositions
+orbital_pool = [(1, 0, 0), (2, 1, 0), (2, 1, 1), (3, 2, 1), (3, 1, -1), (4, 3, 2), (3, 2, 0), (4, 2, -1),
+                (4, 0, 0), (2, 0, 0)]
+
+def time_call(function: Callable[[], Any], repeats: int, setup: Callable[[], Any] | None = None,
+              warmup: int = 1) -> float:
+    """Return the median wall time of function() in seconds, calling setup() untimed before each run.
+
+    The first warmup runs are not timed, so imports, table builds and caches filled on first use
+    do not end up in the median.
+    """
+    samples = []
+    for run in range(warmup + max(repeats, 3)):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        if run >= warmup:
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def bench_sample_orbital(particle_counts: list[int], orbital_counts: list[int], repeats: int) -> dict[str, float]:
+    results = {}
+    for count in particle_counts:
+        for k in orbital_counts:
+            quantum_numbers = orbital_pool[:k]
+            results[f"sample_orbital[particles={count},orbitals={k}]"] = time_call(
+                lambda: sample_orbital(quantum_numbers, count, mode=GlobalConstants.sampling_mode,
+                                       block_size=GlobalConstants.sample_block_size,
+                                       max_blocks=GlobalConstants.max_sample_blocks), repeats)
+    return results
+
+def bench_background_sampler(particle_counts: list[int], orbital_counts: list[int], repeats: int) -> dict[str, float]:
+    """Time from request() until the last batch is polled, with the controller's sampler settings."""
+    results = {}
+    sampler = BackgroundSampler(
+        batch_size=GlobalConstants.particles_per_frame,
+        mode=GlobalConstants.sampling_mode,
+        scale=GlobalConstants.orbital_scale,
+        block_size=GlobalConstants.sample_block_size,
+        max_blocks=GlobalConstants.max_sample_blocks
+    )
+
+    for count in particle_counts:
+        for k in orbital_counts:
+            quantum_numbers = orbital_pool[:k]
+
+            def fill() -> None:
+                sampler.request(quantum_numbers, count)
+                while not sampler.is_complete():
+                    if sampler.poll(GlobalConstants.particles_per_frame) is None:
+                        time.sleep(0.001)
+
+            results[f"background_sampler[particles={count},orbitals={k}]"] = time_call(fill, repeats)
+    return results
+
+def bench_apply_velocity(particle_counts: list[int], orbital_counts: list[int], repeats: int) -> dict[str, float]:
+    results = {}
+    for count in particle_counts:
+        for k in orbital_counts:
+            quantum_numbers = orbital_pool[:k]
+            owner = FakeGameObject(count)
+            positions = inverse_cdf_sample(2, 1, 1, count, rng=np.random.default_rng(0)) * GlobalConstants.orbital_scale
+            owner.blenderObject.particle_systems[0].particles.locations[:] = positions
+            GlobalStorage.set(logic.globalDict, "orbitals", [{"n": n, "l": l, "m": m, "color": (0.0, 0.0, 0.0, 0.0, 1.0)}
+                                                             for (n, l, m) in quantum_numbers])
+            logic.set_owner(owner)
+
+            orbital.velocity_fields.get(quantum_numbers, block=True)  # Builds the cached velocity field outside the timing
+            orbital.apply_velocity_to_orbital()
+            results[f"apply_velocity_to_orbital[particles={count},orbitals={k}]"] = time_call(
+                orbital.apply_velocity_to_orbital, repeats)
+    return results
+
+def random_state(n: int) -> np.ndarray:
+    rng = np.random.default_rng(n)
+    state = rng.normal(size=2 ** n) + 1j * rng.normal(size=2 ** n)
+    return state / np.linalg.norm(state)
+
+def bench_apply_gate(qubit_counts: list[int], repeats: int) -> dict[str, float]:
+    results = {}
+    hadamard = (1 / np.sqrt(2)) * np.array([[1, 1], [1, -1]])
+    cnot = np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]])
+
+    for n in qubit_counts:
+        def setup() -> None:
+            GlobalStorage.set(logic.globalDict, "state_vector", random_state(n))
+            logic.globalDict["is_collapsed"] = False
+
+        def single() -> None:
+            gate_buttons.apply_gate("hadamard", hadamard, [n - 1])
+            read_state(logic.globalDict)
+
+        def double() -> None:
+            gate_buttons.apply_gate("cnot", cnot, [0, n - 1])
+            read_state(logic.globalDict)
+
+        results[f"apply_gate[qubits={n},gate=hadamard]"] = time_call(single, repeats, setup)
+        results[f"apply_gate[qubits={n},gate=cnot]"] = time_call(double, repeats, setup)
+    return results
+
+def bench_sparse_ghz(qubit_counts: list[int], repeats: int) -> dict[str, float]:
+    results = {}
+    hadamard = (1 / np.sqrt(2)) * np.array([[1, 1], [1, -1]])
+    cnot = np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]])
+
+    for n in qubit_counts:
+        def prepare_ghz() -> None:
+            ghz = Circuit()
+            ghz.record("hadamard", hadamard, [0])
+            for q in range(n - 1):
+                ghz.record("cnot", cnot, [q, q + 1])
+            ghz.flush(SparseBackend.basis_state(n))
+
+        results[f"sparse_ghz[qubits={n}]"] = time_call(prepare_ghz, repeats)
+    return results
+
+def bench_derive_superposition(qubit_counts: list[int], repeats: int) -> dict[str, float]:
+    results = {}
+    for n in qubit_counts:
+        state = random_state(n)
+
+        def setup() -> None:
+            GlobalStorage.set(logic.globalDict, "state_vector", state)  # New version: no memoized marginals
+
+        results[f"derive_superposition[qubits={n}]"] = time_call(
+            lambda: [qubits.derive_superposition(i) for i in range(n)], repeats, setup)
+    return results
+
+def bench_wavefunction(point_counts: list[int], orbital_counts: list[int], repeats: int) -> dict[str, float]:
+    results = {}
+    rng = np.random.default_rng(0)
+    for count in point_counts:
+        r = rng.uniform(0, 40, count) * a
+        theta = rng.uniform(0, np.pi, count)
+        phi = rng.uniform(0, 2 * np.pi, count)
+        for k in orbital_counts:
+            quantum_numbers = orbital_pool[:k]
+            results[f"wavefunction_superposition_multiple[points={count},orbitals={k}]"] = time_call(
+                lambda: wavefunction_superposition_multiple(r, theta, phi, quantum_numbers), repeats)
+    return results
+
+def run(quick: bool = False) -> dict[str, float]:
+    """Run every benchmark and return the median times keyed by benchmark name."""
+    repeats = 3 if quick else 7
+    particle_counts = [2000, 20000] if quick else [2000, 20000, 100000]
+    orbital_counts = [1, 3] if quick else [1, 3, 10]
+    qubit_counts = [3, 8] if quick else [3, 8, 12, 16]
+
+    results: dict[str, float] = {}
+    results.update(bench_sample_orbital(particle_counts[:2], orbital_counts, repeats))
+    results.update(bench_background_sampler(particle_counts[:2], orbital_counts, repeats))
+    results.update(bench_apply_velocity(particle_counts, orbital_counts, repeats))
+    results.update(bench_apply_gate(qubit_counts, repeats))
+    results.update(bench_sparse_ghz([20, 40] if quick else [20, 40, 60], repeats))
+    results.update(bench_derive_superposition(qubit_counts, repeats))
+    results.update(bench_wavefunction(particle_counts, orbital_counts, repeats))
+    return results
+
+def find_regressions(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """List the benchmarks slower than their baseline time by more than threshold (a fraction)."""
+    return [
+        f"{name}: {baseline[name]:.6f}s -> {seconds:.6f}s (+{(seconds / baseline[name] - 1) * 100:.0f}%)"
+        for name, seconds in results.items()
+        if name in baseline and baseline[name] > 0 and seconds > baseline[name] * (1 + threshold)
+    ]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time the game's hot paths without UPBGE.")
+    parser.add_argument("--output", default="bench_report.json", help="Where to write the JSON report.")
+    parser.add_argument("--baseline", default=None, help="Report to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown as a fraction, e.g. 0.25.")
+    parser.add_argument("--quick", action="store_true", help="Fewer sizes and repeats.")
+    args = parser.parse_args()
+
+    results = run(args.quick)
+
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                 "quick": args.quick},
+        "results": results
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    for name, seconds in results.items():
+        print(f"{seconds * 1000:10.3f} ms  {name}")
+
+    if args.baseline is None:
+        return 0
+
+    with open(args.baseline) as file:
+        regressions = find_regressions(results, json.load(file)["results"], args.threshold)
+
+    for regression in regressions:
+        print("REGRESSION " + regression, file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import queue
+import threading
+import numpy as np
+from numpy.typing import NDArray
+from scripts.mcmc import MetropolisStats, has_converged, metropolis_update
+from scripts.sampling import (ENVELOPE, INVERSE_CDF, REJECTION, cached_envelope, density_bound, inverse_cdf_sample,
+                              radial_extent, rejection_sample, sample_orbital, single_orbital, valid_quantum_numbers)
+
+'''
+Background orbital sampling.
+A worker thread fills the particle cloud in small batches while the game loop keeps running;
+the controller requests a cloud once and polls for finished batches every frame. An update
+relaxes the current cloud toward a new density on the worker instead, and only falls back to
+sampling from scratch if the relaxed cloud fails the convergence check.
+'''
+
+class SamplingJob:
+    """A single cloud being sampled on a worker thread.
+
+    Attributes:
+        job_id (int): Increasing identifier of the request.
+        quantum_numbers (list): Quantum numbers (n, l, m) of the requested superposition.
+        num_points (int): Target number of points.
+        applied (int): Number of points already handed out by poll().
+        finished (threading.Event): Set once the worker has produced its last batch.
+        error (BaseException | None): Exception raised by the worker, if any.
+        reported (bool): Whether poll() has already raised the error.
+        warm_start (NDArray[np.float64] | None): Cloud (in Bohr radii) an update job relaxes, None to sample.
+        sweeps (int): Metropolis sweeps of an update job.
+        stats (MetropolisStats | None): Acceptance of an update job's sweeps, set once they are done.
+        converged (bool | None): Whether the relaxed cloud passed the convergence check, set before stats.
+    """
+
+    def __init__(self, job_id: int, quantum_numbers: list[tuple[int, int, int]], num_points: int,
+                 warm_start: NDArray[np.float64] | None = None, sweeps: int = 0):
+        self.job_id = job_id
+        self.quantum_numbers = quantum_numbers
+        self.num_points = num_points
+        self.applied = 0
+        self.finished = threading.Event()
+        self.cancelled = threading.Event()
+        self.error: BaseException | None = None
+        self.reported = False
+        self.batches: queue.SimpleQueue[NDArray[np.float64]] = queue.SimpleQueue()
+        self.pending: NDArray[np.float64] = np.zeros((0, 3))
+        self.warm_start = warm_start
+        self.sweeps = sweeps
+        self.stats: MetropolisStats | None = None
+        self.converged: bool | None = None
+
+class BackgroundSampler:
+    """Samples orbital clouds on a worker thread, one job at a time.
+
+    A new request() cancels the job that is still running, so only the newest
+    orbital list is ever sampled to completion.
+    """
+
+    def __init__(self, batch_size: int = 2000, mode: str = INVERSE_CDF, scale: float = 1.0,
+                 block_size: int = 65536, max_blocks: int = 2000, reference_size: int = 5000):
+        self.batch_size = batch_size
+        self.mode = mode
+        self.scale = scale
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.reference_size = reference_size
+        self.job: SamplingJob | None = None
+        self._next_id = 0
+
+    def request(self, quantum_numbers: list[tuple[int, int, int]], num_points: int) -> int:
+        """Start sampling a new cloud, cancelling the previous job.
+
+        Args:
+            quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+            num_points (int): Target number of points.
+
+        Returns:
+            int: Identifier of the new job.
+        """
+        self.cancel()
+
+        self._next_id += 1
+        job = SamplingJob(self._next_id, list(quantum_numbers), num_points)
+        self.job = job
+
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job.job_id
+
+    def update(self, positions: NDArray[np.float64], quantum_numbers: list[tuple[int, int, int]], sweeps: int) -> int:
+        """Relax an existing cloud toward a new density on the worker, cancelling the previous job.
+
+        The relaxed cloud is checked against an exact sample of reference_size points (see
+        has_converged) before anything is handed out; if it fails, the job samples the cloud from
+        scratch like request() would, so poll() only ever returns points of the new density.
+
+        Args:
+            positions (NDArray[np.float64]): The current cloud of shape (N, 3), in Bohr radii.
+            quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+            sweeps (int): Metropolis sweeps to run (see metropolis_update).
+
+        Returns:
+            int: Identifier of the new job.
+        """
+        self.cancel()
+
+        self._next_id += 1
+        job = SamplingJob(self._next_id, list(quantum_numbers), len(positions), warm_start=positions, sweeps=sweeps)
+        self.job = job
+
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job.job_id
+
+    def supply(self, quantum_numbers: list[tuple[int, int, int]], num_points: int) -> int:
+        """Cancel the running job and record a cloud obtained without sampling as complete.
+
+        Args:
+            quantum_numbers (list): Quantum numbers (n, l, m) of the supplied cloud.
+            num_points (int): Number of points already applied.
+
+        Returns:
+            int: Identifier of the new (finished) job.
+        """
+        self.cancel()
+
+        self._next_id += 1
+        job = SamplingJob(self._next_id, list(quantum_numbers), num_points)
+        job.applied = num_points
+        job.finished.set()
+        self.job = job
+        return job.job_id
+
+    def cancel(self) -> None:
+        """Ask the running job, if any, to stop after its current batch."""
+        if self.job is not None:
+            self.job.cancelled.set()
+
+    def poll(self, max_points: int) -> tuple[int, NDArray[np.float64]] | None:
+        """Take up to max_points finished points of the current job.
+
+        Args:
+            max_points (int): Maximum number of points to hand out this frame.
+
+        Returns:
+            tuple[int, NDArray[np.float64]] | None: (index of the first point, positions of shape (k, 3)),
+            or None if no new points are ready.
+
+        Raises:
+            BaseException: The worker's exception, on the first poll after the job failed.
+        """
+        job = self.job
+        if job is None:
+            return None
+        if job.error is not None:
+            # The failed job stays current, so it is reported once and not retried until the next request()
+            if job.reported:
+                return None
+            job.reported = True
+            raise job.error
+
+        ready = [job.pending]
+        count = len(job.pending)
+        while count < max_points:
+            try:
+                batch = job.batches.get_nowait()
+            except queue.Empty:
+                break
+            ready.append(batch)
+            count += len(batch)
+
+        points = np.concatenate(ready)
+        job.pending = points[max_points:]
+        points = points[:max_points]
+
+        if len(points) == 0:
+            return None
+
+        start = job.applied
+        job.applied += len(points)
+        return start, points
+
+    def is_complete(self) -> bool:
+        """Check whether every point of the current job has been handed out."""
+        job = self.job
+        return job is None or (job.finished.is_set() and job.error is None and job.batches.empty()
+                               and len(job.pending) == 0)
+
+    def _run(self, job: SamplingJob) -> None:
+        try:
+            rng = np.random.default_rng()
+            quantum_numbers = valid_quantum_numbers(job.quantum_numbers)
+            r_max = radial_extent(quantum_numbers)
+
+            orbital = single_orbital(quantum_numbers) if self.mode == INVERSE_CDF else None
+            bound = density_bound(quantum_numbers, r_max) if orbital is None and self.mode == REJECTION else None
+            envelope = cached_envelope(tuple(quantum_numbers), r_max) \
+                if orbital is None and self.mode != REJECTION and quantum_numbers else None
+
+            produced = 0
+            if job.warm_start is not None and quantum_numbers:
+                positions, stats = metropolis_update(job.warm_start, quantum_numbers, sweeps=job.sweeps, rng=rng)
+                reference = sample_orbital(quantum_numbers, self.reference_size, mode=ENVELOPE,
+                                           block_size=self.block_size, max_blocks=self.max_blocks, rng=rng)
+                job.converged = has_converged(positions, reference)
+                job.stats = stats  # Last, so a reader that sees stats also sees converged
+
+                if job.converged:
+                    for start in range(0, len(positions), self.batch_size):
+                        job.batches.put(positions[start:start + self.batch_size] * self.scale)
+                    produced = job.num_points
+
+            while produced < job.num_points and not job.cancelled.is_set():
+                size = min(self.batch_size, job.num_points - produced)
+
+                if orbital is not None:
+                    batch = inverse_cdf_sample(*orbital, size, r_max=r_max, rng=rng)
+                elif envelope is not None:
+                    batch = envelope.sample(size, block_size=self.block_size, max_blocks=self.max_blocks, rng=rng)
+                else:
+                    batch = rejection_sample(quantum_numbers, size, r_max=r_max, block_size=self.block_size,
+                                             max_blocks=self.max_blocks, rng=rng, bound=bound)
+
+                if len(batch) == 0:
+                    break
+
+                job.batches.put(batch * self.scale)
+                produced += len(batch)
+        except BaseException as error:
+            job.error = error
+        finally:
+            job.finished.set()
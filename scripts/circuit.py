@@ -0,0 +1,150 @@
+from typing import Any
+import numpy as np
+from numpy.typing import NDArray
+from scripts.quantum_state import num_qubits
+from scripts.state_backend import StateBackend, as_backend, select_backend
+from scripts.global_manager import GlobalStorage
+
+'''
+Lazy gate queue.
+Gate buttons record gates instead of applying them. The queue is flushed when something
+reads the state vector: consecutive single-qubit gates on the same wire are fused into one
+2x2 matrix first, so a long replayed sequence costs one pass over the vector per fused block.
+Each pass goes through a state backend, which may switch between dense and sparse storage.
+The shared store keeps that backend between frames, so a sparse state stays sparse and a
+flush costs only the gates it applies.
+'''
+
+default_state_vector = np.array([0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+
+class Circuit:
+    """A queue of pending gates with a cache of compiled (possibly fused) unitaries.
+
+    Attributes:
+        pending (list): Recorded (name, matrix, targets) entries not yet applied.
+        unitaries (dict): Compiled unitaries keyed by (gate names, targets, n_qubits).
+        passes (int): Number of passes over the state vector performed by flush().
+        sparse_below, dense_above, max_dense_qubits: Backend switching thresholds, see select_backend.
+    """
+
+    def __init__(self, max_cached: int = 256, sparse_below: float = 0.05, dense_above: float = 0.25,
+                 max_dense_qubits: int = 24):
+        self.pending: list[tuple[str, NDArray[np.complex128], tuple[int, ...]]] = []
+        self.unitaries: dict[tuple[tuple[str, ...], tuple[int, ...], int], NDArray[np.complex128]] = {}
+        self.max_cached = max_cached
+        self.passes = 0
+        self.sparse_below = sparse_below
+        self.dense_above = dense_above
+        self.max_dense_qubits = max_dense_qubits
+
+    def record(self, name: str, gate: NDArray[np.complex128], targets: list[int]) -> None:
+        """Queue a gate for the next flush.
+
+        Args:
+            name (str): Gate name, used as part of the cache key; gates with the same name must share a matrix.
+            gate (NDArray[np.complex128]): Gate matrix of shape (2^k, 2^k); a real gate is kept real, so
+                a state only becomes complex once a complex gate (e.g. Pauli-Y) acts on it.
+            targets (list[int]): The k target qubit indices (0-based).
+        """
+        self.pending.append((name, np.asarray(gate, dtype=np.result_type(gate, np.float64)), tuple(targets)))
+
+    def clear(self) -> None:
+        """Drop the pending gates without applying them."""
+        self.pending.clear()
+
+    def compile(self, names: tuple[str, ...], gates: list[NDArray[np.complex128]], targets: tuple[int, ...],
+                n_qubits: int) -> NDArray[np.complex128]:
+        """Return the product of a run of gates on the same targets, reusing the cached unitary if present.
+
+        Args:
+            names (tuple[str, ...]): Names of the gates in application order.
+            gates (list[NDArray[np.complex128]]): Matrices of the gates in application order.
+            targets (tuple[int, ...]): Shared target qubits of the run.
+            n_qubits (int): Number of qubits of the state the run acts on.
+
+        Returns:
+            NDArray[np.complex128]: The fused unitary (last gate leftmost).
+        """
+        key = (names, targets, n_qubits)
+        unitary = self.unitaries.get(key)
+
+        if unitary is None:
+            unitary = gates[0]
+            for gate in gates[1:]:
+                unitary = gate @ unitary
+            if len(self.unitaries) >= self.max_cached:
+                self.unitaries.pop(next(iter(self.unitaries)))
+            self.unitaries[key] = unitary
+
+        return unitary
+
+    def flush(self, state: NDArray[np.complex128] | StateBackend) -> NDArray[np.complex128] | StateBackend:
+        """Apply and clear every pending gate.
+
+        Single-qubit gates are buffered per wire and fused; a wire's buffer is applied when a
+        multi-qubit gate touches it or at the end of the queue. After every pass the state may
+        move between the dense and sparse backends.
+
+        Args:
+            state (NDArray[np.complex128] | StateBackend): State vector of length 2^n, or a backend.
+
+        Returns:
+            NDArray[np.complex128] | StateBackend: The new state, in the same form as given.
+        """
+        if not self.pending:
+            return state
+
+        n = num_qubits(state)
+        backend = as_backend(state)
+        wires: dict[int, tuple[list[str], list[NDArray[np.complex128]]]] = {}
+
+        def apply(backend: StateBackend, unitary: NDArray[np.complex128], targets: list[int]) -> StateBackend:
+            self.passes += 1
+            return select_backend(backend.apply_gate(unitary, targets), self.sparse_below, self.dense_above,
+                                  self.max_dense_qubits)
+
+        def apply_wire(backend: StateBackend, qubit: int) -> StateBackend:
+            names, gates = wires.pop(qubit)
+            return apply(backend, self.compile(tuple(names), gates, (qubit,), n), [qubit])
+
+        for name, gate, targets in self.pending:
+            if len(targets) == 1:
+                names, gates = wires.setdefault(targets[0], ([], []))
+                names.append(name)
+                gates.append(gate)
+                continue
+
+            for qubit in targets:
+                if qubit in wires:
+                    backend = apply_wire(backend, qubit)
+
+            backend = apply(backend, self.compile((name,), [gate], targets, n), list(targets))
+
+        for qubit in sorted(wires):
+            backend = apply_wire(backend, qubit)
+
+        self.pending.clear()
+        return backend if isinstance(state, StateBackend) else backend.to_dense()
+
+circuit = Circuit()
+
+def read_state(store: dict[str, Any]) -> StateBackend:
+    """Flush the pending gates into store["state_vector"] (bumping its version) and return it.
+
+    store["state_vector"] holds a StateBackend; a plain array found there (the initial state)
+    is wrapped once. Controllers read the state through the backend interface, e.g.
+    amplitude() or marginals(), so a large sparse state is never expanded to 2^n entries.
+
+    Args:
+        store (dict): The shared state dictionary (logic.globalDict).
+
+    Returns:
+        StateBackend: The up-to-date state.
+    """
+    state = store.get("state_vector", default_state_vector)
+
+    if not isinstance(state, StateBackend) or circuit.pending:
+        state = circuit.flush(as_backend(state))
+        GlobalStorage.set(store, "state_vector", state)
+
+    return state
@@ -1,7 +1,26 @@
 from bge import logic
 import numpy as np
+from scripts.quantum_state import num_qubits, outcome_counts, sample_outcomes
+from scripts.circuit import circuit, default_state_vector, read_state
+from scripts.global_manager import GlobalConstants, GlobalStorage, VersionedMemo
 # from scripts.global_manager import GlobalControllerManager
+from scripts.profiling import profiler
 
+profile = profiler.profile(lambda: logic.globalDict)
+
+rng = np.random.default_rng()
+measurement_outcomes: VersionedMemo = VersionedMemo()
+
+def current_outcomes() -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Returns the measurable basis indices of the current state and their cumulative distribution,
+    built once per version.
+    '''
+    state = read_state(logic.globalDict)
+    version = GlobalStorage.version(logic.globalDict, "state_vector")
+    return measurement_outcomes.get(version, state.outcomes)
+
+@profile
 def collapse_state_vector() -> None:
     '''
     Collapses the state vector to a random weighted bit sequence.
@@ -9,20 +28,53 @@ def collapse_state_vector() -> None:
     '''
     # Logic for collapsing GlobalStorage.state_vector
 
-    ve = logic.globalDict.get("state_vector", np.array([0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0]))
-    num_states = len(ve)
-    
-    probabilities = np.abs(ve)**2
-    probabilities /= np.sum(probabilities)
-    
-    collapsed_index = np.random.choice(num_states, p=probabilities)
-    
-    new_ve = np.zeros_like(ve)
-    new_ve[collapsed_index] = 1.0
+    indices, cdf = current_outcomes()
+    state = read_state(logic.globalDict)
+
+    collapsed_index = int(indices[sample_outcomes(cdf, 1, rng)[0]])
     
-    logic.globalDict["state_vector"] = new_ve
+    GlobalStorage.set(logic.globalDict, "state_vector", state.collapse(collapsed_index))
     logic.globalDict["is_collapsed"] = True
 
+@profile
+def measure_selected_qubits() -> None:
+    '''
+    Measures only the selected qubit(s), leaving the rest in superposition.
+    The state vector is projected onto the observed outcome and renormalized.
+    '''
+    state = read_state(logic.globalDict)
+    n = num_qubits(state)
+
+    selected = [logic.globalDict.get("selected_qubit_one", -1), logic.globalDict.get("selected_qubit_two", -1)]
+    qubits = list(dict.fromkeys(q for q in selected if 0 <= q < n))
+
+    if not qubits:
+        return  # No operation until a qubit is selected
+
+    outcome, new_state = state.measure(qubits, rng)
+
+    GlobalStorage.set(logic.globalDict, "state_vector", new_state)
+    logic.globalDict["last_measurement"] = {q: (outcome >> (len(qubits) - 1 - i)) & 1 for i, q in enumerate(qubits)}
+
+@profile
+def measure_shots() -> None:
+    '''
+    Measures a copy of the state vector many times without disturbing it.
+    The histogram of the observed basis indices is stored in logic.globalDict["measurement_counts"]
+    as {index: count} and, if the owner is a text object, shown on it.
+    '''
+    indices, cdf = current_outcomes()
+    n = num_qubits(read_state(logic.globalDict))
+
+    counts = outcome_counts(cdf, GlobalConstants.measurement_shots, rng)
+    histogram = {int(index): int(count) for index, count in zip(indices, counts) if count > 0}
+    logic.globalDict["measurement_counts"] = histogram
+
+    data = getattr(logic.getCurrentController().owner.blenderObject, "data", None)
+    if hasattr(data, "body"):
+        data.body = "\n".join(f"|{index:0{n}b}>: {count}" for index, count in sorted(histogram.items()))
+
+@profile
 def hadamard_gate() -> None:
     '''
     Applies the Hadamard gate to the state vector.
@@ -31,10 +83,11 @@ def hadamard_gate() -> None:
     # Logic for applying Hadamard gate to GlobalStorage.state_vector
 
     matrix = (1/np.sqrt(2)) * np.array([[1, 1], [1, -1]])
-    apply_gate(matrix, logic.globalDict.get("selected_qubit_one", -1))
+    apply_gate("hadamard", matrix, [logic.globalDict.get("selected_qubit_one", -1)])
 
     logic.globalDict["is_collapsed"] = False
 
+@profile
 def pauli_x_gate() -> None:
     '''
     Applies the Pauli-X gate to the state vector.
@@ -44,7 +97,8 @@ def pauli_x_gate() -> None:
 
     matrix = np.array([[0, 1], [1, 0]])
 
-    apply_gate(matrix, logic.globalDict.get("selected_qubit_one", -1))
+    apply_gate("pauli_x", matrix, [logic.globalDict.get("selected_qubit_one", -1)])
+@profile
 def pauli_y_gate() -> None:
     '''
     Applies the Pauli-Y gate to the state vector.
@@ -54,7 +108,8 @@ def pauli_y_gate() -> None:
 
     matrix = np.array([[0, -1j], [1j, 0]], dtype=complex)
 
-    apply_gate(matrix, logic.globalDict.get("selected_qubit_one", -1))
+    apply_gate("pauli_y", matrix, [logic.globalDict.get("selected_qubit_one", -1)])
+@profile
 def pauli_z_gate() -> None:
     '''
     Applies the Pauli-Z gate to the state vector.
@@ -64,8 +119,9 @@ def pauli_z_gate() -> None:
 
     matrix = np.array([[1, 0], [0, -1]])
 
-    apply_gate(matrix, logic.globalDict.get("selected_qubit_one", -1))
+    apply_gate("pauli_z", matrix, [logic.globalDict.get("selected_qubit_one", -1)])
 
+@profile
 def cnot_gate() -> None:
     '''
     Applies the CNOT gate to the state vector.
@@ -78,8 +134,9 @@ def cnot_gate() -> None:
                        [0, 0, 0, 1],
                        [0, 0, 1, 0]])
 
-    apply_gate(matrix, logic.globalDict.get("selected_qubit_one", -1))
+    apply_gate("cnot", matrix, [logic.globalDict.get("selected_qubit_one", -1), logic.globalDict.get("selected_qubit_two", -1)])
 
+@profile
 def swap_gate() -> None:
     '''
     Applies the SWAP gate to the state vector.
@@ -92,8 +149,9 @@ def swap_gate() -> None:
                        [0, 1, 0, 0],
                        [0, 0, 0, 1]])
     
-    apply_gate(matrix, logic.globalDict.get("selected_qubit_one", -1))
+    apply_gate("swap", matrix, [logic.globalDict.get("selected_qubit_one", -1), logic.globalDict.get("selected_qubit_two", -1)])
 
+@profile
 def imaginary_swap_gate() -> None:
     '''
     Applies the iSWAP gate to the state vector.
@@ -106,43 +164,30 @@ def imaginary_swap_gate() -> None:
                        [0, 1j, 0, 0],
                        [0, 0, 0, 1]])
     
-    apply_gate(matrix, logic.globalDict.get("selected_qubit_one", -1))
+    apply_gate("imaginary_swap", matrix, [logic.globalDict.get("selected_qubit_one", -1), logic.globalDict.get("selected_qubit_two", -1)])
 
-def apply_gate(gate: np.ndarray, qubit_index: int) -> None:
+def apply_gate(name: str, gate: np.ndarray, qubit_indices: list[int]) -> None:
     """
-    Applies a quantum gate to a specific qubit in a multi-qubit system.
+    Applies a quantum gate to specific qubits in a multi-qubit system.
+
+    The gate is queued on the shared circuit and applied by tensor contraction the next
+    time the state vector is read, fused with neighbouring single-qubit gates on the same wire.
     
     Parameters:
-        state_vector (numpy.ndarray): The state vector of the multi-qubit system.
-        gate (numpy.ndarray): The gate matrix (2x2 for single-qubit, larger for multi-qubit gates).
-        qubit_index (int): The index of the qubit (0-based) to which the gate should be applied.
-        num_qubits (int): The total number of qubits in the system.
-        
-    Returns:
-        numpy.ndarray: The new state vector after applying the gate.
+        name (str): The gate name, used to cache its compiled unitary.
+        gate (numpy.ndarray): The gate matrix (2x2 for single-qubit, 4x4 for two-qubit gates).
+        qubit_indices (list[int]): The indices of the qubits (0-based) to which the gate should be applied.
+            For two-qubit gates the first index is the control (CNOT) or first swapped qubit.
     """
 
     if (logic.globalDict.get("is_collapsed", False)):
         return  # No operation if the state is collapsed
     
-    state_vector = logic.globalDict.get("state_vector", np.array([0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0]))
+    state_vector = logic.globalDict.get("state_vector", default_state_vector)
 
-    num_qubits = 4
+    n = num_qubits(state_vector)
 
-    # Identity matrix of size 2 (for single qubit)
-    I = np.array([[1, 0], [0, 1]])
+    if len(set(qubit_indices)) != len(qubit_indices) or any(q < 0 or q >= n for q in qubit_indices):
+        return  # No operation until enough distinct qubits are selected
 
-    # Build the full gate matrix using tensor product
-    full_gate = I
-    for i in range(num_qubits):
-        if i == qubit_index:
-            full_gate = np.kron(full_gate, gate)  # Apply the gate on the desired qubit
-        else:
-            full_gate = np.kron(full_gate, I)  # Apply identity on other qubits
-    
-    # Apply the full gate to the state vector
-    new_state = np.dot(full_gate, state_vector)
-
-    logic.globalDict["state_vector"] = new_state
-    
-    return
\ No newline at end of file
+    circuit.record(name, gate, qubit_indices)
@@ -1,15 +1,45 @@
+from __future__ import annotations
 from bge import logic
 import numpy as np
-from numpy.typing import NDArray
-from scripts.global_manager import GlobalConstants, OrbitalData
-from scripts.wavefunction import wavefunction_superposition_multiple 
-from scripts.wavefunction import guiding_equation_superposition_multiple
+from scripts.global_manager import GlobalConstants, GlobalStorage, OrbitalData
+from scripts.sampling import valid_quantum_numbers
+from scripts.background import BackgroundSampler
+from scripts.velocity_field import VelocityFieldCache, point_velocities
+from scripts.particles import read_locations, write_locations
+from scripts.integrator import adaptive_advance, euler_step, rk4_step
+from scripts.mcmc import StreamingSampler
+from scripts.orbital_library import OrbitalLibrary
 # from scripts.global_manager import GlobalControllerManager
+from scripts.profiling import profiler
 
+profile = profiler.profile(lambda: logic.globalDict)
+
+sampler = BackgroundSampler(
+    batch_size=GlobalConstants.particles_per_frame,
+    mode=GlobalConstants.sampling_mode,
+    scale=GlobalConstants.orbital_scale,
+    block_size=GlobalConstants.sample_block_size,
+    max_blocks=GlobalConstants.max_sample_blocks
+)
+
+library = OrbitalLibrary(logic.expandPath(GlobalConstants.orbital_library))
+
+streamer = StreamingSampler(scale=GlobalConstants.orbital_scale)
+
+velocity_fields = VelocityFieldCache(GlobalConstants.velocity_grid_resolution)
+
+@profile
 def reshape_orbital() -> None:
     '''
     Reshapes the orbital according to specific parameters.
     This is useful for visualizing different orbital configurations.
+
+    Runs every frame: a new version of the orbital list starts (and cancels any older)
+    background sampling job, and finished particles are applied a batch at a time.
+    When one orbital was appended to a fully sampled cloud, the worker relaxes the current cloud
+    toward the new density instead (see update_cloud), and a single orbital is sliced from the
+    precomputed library when it is available (see load_from_library). With cloud_sampler
+    "streaming", a persistent walker population is advanced every frame instead (see stream_orbital).
     '''
     obj = logic.getCurrentController().owner
     blender_obj = obj.blenderObject
@@ -22,11 +52,40 @@ def reshape_orbital() -> None:
 
     ps = pys.particles
 
-    density_positions = create_density_plot([(data["n"], data["l"], data["m"]) for data in orbital_data])
-
-    for i, particle in enumerate(ps):
-        if i < len(density_positions):
-            particle.location = density_positions[i].tolist()
+    version = GlobalStorage.version(logic.globalDict, "orbitals")
+
+    if GlobalConstants.cloud_sampler == "streaming":
+        stream_orbital(ps, [(data["n"], data["l"], data["m"]) for data in orbital_data])
+    elif sampler.job is None or obj.get("orbitals_version", -1) != version:
+        obj["orbitals_version"] = version
+        quantum_numbers = [(data["n"], data["l"], data["m"]) for data in orbital_data]
+        previous = obj.get("cloud_orbitals")
+
+        if (GlobalConstants.incremental_sweeps > 0 and sampler.is_complete() and previous is not None
+                and quantum_numbers[:-1] == previous and valid_quantum_numbers(previous)):
+            update_cloud(ps, quantum_numbers)
+        elif not load_from_library(ps, quantum_numbers):
+            sampler.request(quantum_numbers, GlobalConstants.num_particles)
+
+        obj["cloud_orbitals"] = quantum_numbers
+
+    batch = sampler.poll(GlobalConstants.particles_per_frame) if GlobalConstants.cloud_sampler != "streaming" else None
+
+    job = sampler.job
+    if job is not None and job.stats is not None:
+        logic.globalDict["cloud_update_stats"] = {
+            "local": job.stats.local_ratios,
+            "jump": job.stats.jump_ratios,
+            "step_sizes": job.stats.step_sizes,
+            "converged": job.converged
+        }
+
+    if batch is not None:
+        start, density_positions = batch
+        locations = read_locations(ps)
+        count = min(len(density_positions), len(locations) - start)
+        locations[start:start + count] = density_positions[:count]
+        write_locations(ps, locations)
 
     last_orbital_data_color = orbital_data[-1]["color"] if orbital_data else (0.0, 0.0, 0.0, 0.0, 0.0)
 
@@ -39,43 +98,60 @@ def reshape_orbital() -> None:
 
     material.diffuse_color = new_rgba_color
 
-def create_density_plot(quantum_numbers: list[tuple[int, int, int]]) -> NDArray[np.float64]:
+def load_from_library(ps, quantum_numbers: list[tuple[int, int, int]]) -> bool:
     '''
-    Creates a density plot for the orbital particles.
-    This is useful for visualizing particle distributions.
+    Applies a precomputed cloud when the list holds exactly one valid orbital.
+    Returns False if the library cannot supply it, so the caller samples instead.
     '''
-    positions: NDArray[np.float64] = np.zeros((GlobalConstants.num_particles, 3))
+    valid = valid_quantum_numbers(quantum_numbers)
+    if len(valid) != 1 or len(ps) == 0:
+        return False
 
-    num_particles = 0
+    points = library.get(valid[0], len(ps))
+    if points is None:
+        return False
 
-    while (num_particles < GlobalConstants.num_particles):
-        # Generate random spherical coordinates
-        r = np.random.uniform(0, 1)
-        theta = np.random.uniform(0, np.pi)
-        phi = np.random.uniform(0, 2 * np.pi)
+    write_locations(ps, points * np.float32(GlobalConstants.orbital_scale))
+    sampler.supply(quantum_numbers, len(ps))
+    return True
 
-        r_array = np.array([r])
-        theta_array = np.array([theta])
-        phi_array = np.array([phi])
+def update_cloud(ps, quantum_numbers: list[tuple[int, int, int]]) -> None:
+    '''
+    Starts moving the existing particles toward the density of a list with one orbital appended.
+    The Metropolis-Hastings sweeps run on the sampler's worker with the current cloud as a warm
+    start; a cloud that fails the convergence check is resampled there instead. Accept ratios
+    and the check are stored in logic.globalDict["cloud_update_stats"] once the sweeps are done.
+    '''
+    appended = quantum_numbers[-1]
+    if appended not in valid_quantum_numbers([appended]):
+        return  # An invalid orbital does not change the density
 
-        probability = wavefunction_superposition_multiple(r_array, theta_array, phi_array, quantum_numbers)[0] ** 2
+    positions = read_locations(ps).astype(np.float64) / GlobalConstants.orbital_scale
+    sampler.update(positions, quantum_numbers, GlobalConstants.incremental_sweeps)
 
-        random_value = np.random.uniform(0, 1)
+def stream_orbital(ps, quantum_numbers: list[tuple[int, int, int]]) -> None:
+    '''
+    Advances the streaming walkers by a fixed amount of work per frame.
+    The walkers always hold a cloud; when the orbital list changes they drift toward the new
+    density. Accept ratios are stored in logic.globalDict["cloud_update_stats"].
+    '''
+    if len(ps) == 0:
+        return
 
-        if random_value > probability:
-            continue  # Reject this point
+    streamer.set_target(quantum_numbers)
 
-        # Convert to Cartesian coordinates
-        x = r * np.sin(theta) * np.cos(phi)
-        y = r * np.sin(theta) * np.sin(phi)
-        z = r * np.cos(theta)
+    locations = streamer.advance(read_locations(ps), steps=GlobalConstants.streaming_steps_per_frame,
+                                 walkers=GlobalConstants.streaming_walkers_per_step)
 
-        positions[num_particles] = [x, y, z]
+    logic.globalDict["cloud_update_stats"] = {
+        "local": streamer.stats.local_ratios,
+        "jump": streamer.stats.jump_ratios,
+        "step_sizes": streamer.stats.step_sizes
+    }
 
-        num_particles += 1
-    
-    return positions
+    write_locations(ps, locations)
 
+@profile
 def apply_velocity_to_orbital() -> None:
     '''
     Applies velocity to the orbital particles.
@@ -94,55 +170,31 @@ def apply_velocity_to_orbital() -> None:
 
     ps = pys.particles
 
-    if ps.count == 0:
+    if len(ps) == 0:
         return
 
-    positions = np.array([particle.location for particle in ps])
-    spherical_positions = cartesian_to_spherical(positions[:, 0], positions[:, 1], positions[:, 2])
-
-    velocities = guiding_equation_superposition_multiple(
-        spherical_positions[0], spherical_positions[1], spherical_positions[2], [(data["n"], data["l"], data["m"]) for data in orbital_data])
-
-    cartesian_velocities = np.zeros_like(velocities)
-    for i in range(len(velocities[0])):
-        r, theta, phi = spherical_positions[0][i], spherical_positions[1][i], spherical_positions[2][i]
-        v_r, v_theta, v_phi = velocities[0][i], velocities[1][i], velocities[2][i]
-
-        # Convert spherical velocity to Cartesian velocity
-        vx = (np.sin(theta) * np.cos(phi)) * v_r + (np.cos(theta) * np.cos(phi)) * v_theta - (np.sin(phi)) * v_phi
-        vy = (np.sin(theta) * np.sin(phi)) * v_r + (np.cos(theta) * np.sin(phi)) * v_theta + (np.cos(phi)) * v_phi
-        vz = (np.cos(theta)) * v_r - (np.sin(theta)) * v_theta
-
-        cartesian_velocities[i] = [vx, vy, vz]
+    quantum_numbers = valid_quantum_numbers([(data["n"], data["l"], data["m"]) for data in orbital_data])
+
+    # Blender units -> Bohr radii, and game seconds -> atomic time units
+    positions = read_locations(ps).astype(np.float64) / GlobalConstants.orbital_scale
+    duration = GlobalConstants.time_scale * GlobalConstants.timestep
+
+    # The grid is built on a worker thread; until it is ready the velocities are evaluated directly
+    field = velocity_fields.get(quantum_numbers) if GlobalConstants.velocity_grid_resolution > 0 else None
+    if field is not None:
+        velocity = field.lookup
+    else:
+        velocity = lambda points: point_velocities(points, quantum_numbers)
+
+    if GlobalConstants.integrator == "adaptive":
+        new_positions, _, _ = adaptive_advance(velocity, positions, duration,
+                                               tolerance=GlobalConstants.integration_tolerance,
+                                               max_substeps=GlobalConstants.max_substeps,
+                                               time_budget=GlobalConstants.integration_time_budget)
+    elif GlobalConstants.integrator == "rk4":
+        new_positions, _ = rk4_step(velocity, positions, duration)
+    else:
+        new_positions, _ = euler_step(velocity, positions, duration)
 
     # Apply velocities to particles
-    for i, particle in enumerate(ps):
-        particle.position += cartesian_velocities[i].tolist() * GlobalConstants.timestep
-    
-def cartesian_to_spherical(x: NDArray[np.float64], y: NDArray[np.float64], z: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
-    """Convert Cartesian coordinates to spherical coordinates.
-    
-    Args:
-        x, y, z (NDArray[np.float64]): Cartesian coordinates.
-        
-    Returns:
-        r, theta, phi (NDArray[np.float64]): Spherical coordinates.
-    """
-    r = np.sqrt(x**2 + y**2 + z**2)
-    theta = np.arccos(z / r)  # polar angle
-    phi = np.arctan2(y, x)    # azimuthal angle
-    return r, theta, phi
-
-def spherical_to_cartesian(r: NDArray[np.float64], theta: NDArray[np.float64], phi: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
-    """Convert spherical coordinates to Cartesian coordinates.
-    
-    Args:
-        r, theta, phi (NDArray[np.float64]): Spherical coordinates.
-        
-    Returns:
-        x, y, z (NDArray[np.float64]): Cartesian coordinates.
-    """
-    x = r * np.sin(theta) * np.cos(phi)
-    y = r * np.sin(theta) * np.sin(phi)
-    z = r * np.cos(theta)
-    return x, y, z
\ No newline at end of file
+    write_locations(ps, new_positions * GlobalConstants.orbital_scale)
@@ -1,8 +1,13 @@
 from bge import logic
 import numpy as np
-from scripts.global_manager import OrbitalData
+from scripts.global_manager import GlobalStorage, OrbitalData
+from scripts.circuit import read_state
 # from scripts.global_manager import GlobalControllerManager
+from scripts.profiling import profiler
 
+profile = profiler.profile(lambda: logic.globalDict)
+
+@profile
 def save_orbital():
     '''
     Saves the current orbital configuration.
@@ -14,7 +19,7 @@ def save_orbital():
     m: magnetic quantum number  | -2 - 2
     '''
 
-    ve = logic.globalDict.get("state_vector", np.array([0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0]))
+    ve = read_state(logic.globalDict).amplitude(np.arange(8))  # Only the first eight amplitudes are mapped
 
     orbital_data: OrbitalData = {
         "n": round(ve[0].real * 3) + 1,
@@ -24,13 +29,13 @@ def save_orbital():
     }
     current_orbitals = logic.globalDict.get("orbitals", [])
 
-    current_orbitals.append(orbital_data)
-    logic.globalDict["orbitals"] = current_orbitals
+    GlobalStorage.set(logic.globalDict, "orbitals", current_orbitals + [orbital_data])
 
+@profile
 def clear_orbitals():
     '''
     Deletes the all saved orbital configurations.
     This is useful for managing memory and state history.
     '''
 
-    logic.globalDict["orbitals"] = []
\ No newline at end of file
+    GlobalStorage.set(logic.globalDict, "orbitals", [])
\ No newline at end of file
@@ -0,0 +1,34 @@
+from bge import logic
+from scripts.global_manager import GlobalConstants
+from scripts.profiling import profiler, profiling_flag
+
+def toggle_profiling() -> None:
+    '''
+    Switches controller timing on or off.
+    Turning it on starts a fresh set of measurements.
+    '''
+    enabled = not logic.globalDict.get(profiling_flag, False)
+    if enabled:
+        profiler.reset()
+    logic.globalDict[profiling_flag] = enabled
+
+def report_frame_times() -> None:
+    '''
+    Shows the per-controller frame-time summary every few frames while profiling is on.
+    The summary is written to the body of the owner, which should be a text object.
+    '''
+    if not logic.globalDict.get(profiling_flag, False):
+        return
+
+    obj = logic.getCurrentController().owner
+
+    frame = obj.get("profiling_frame", 0) + 1
+    obj["profiling_frame"] = frame
+    if frame % GlobalConstants.profile_report_interval != 0:
+        return
+
+    text = profiler.summary(GlobalConstants.frame_budget)
+
+    data = getattr(obj.blenderObject, "data", None)
+    if hasattr(data, "body"):
+        data.body = text
@@ -1,5 +1,10 @@
 from bge import logic
+from scripts.global_manager import GlobalStorage
+from scripts.profiling import profiler
 
+profile = profiler.profile(lambda: logic.globalDict)
+
+@profile
 def edit_principal():
     '''
     Displays all available principal quantum numbers on the UI.
@@ -8,6 +13,11 @@ def edit_principal():
     obj = logic.getCurrentController().owner
     blender_obj = obj.blenderObject
 
+    version = GlobalStorage.version(logic.globalDict, "orbitals")
+    if obj.get("orbitals_version", -1) == version:
+        return  # Label is already up to date
+    obj["orbitals_version"] = version
+
     orbital_data = logic.globalDict.get("orbitals", [])
 
     principal_quantum_numbers = sorted(set([data["n"] for data in orbital_data]))
@@ -15,6 +25,7 @@ def edit_principal():
     text = "n: " + ", ".join(str(n) for n in principal_quantum_numbers)
     blender_obj.data.body = text
 
+@profile
 def edit_azimuthal():
     '''
     Displays all available azimuthal quantum numbers on the UI.
@@ -23,6 +34,11 @@ def edit_azimuthal():
     obj = logic.getCurrentController().owner
     blender_obj = obj.blenderObject
 
+    version = GlobalStorage.version(logic.globalDict, "orbitals")
+    if obj.get("orbitals_version", -1) == version:
+        return  # Label is already up to date
+    obj["orbitals_version"] = version
+
     orbital_data = logic.globalDict.get("orbitals", [])
 
     azimuthal_quantum_numbers = sorted(set([data["l"] for data in orbital_data]))
@@ -30,6 +46,7 @@ def edit_azimuthal():
     text = "l: " + ", ".join(str(l) for l in azimuthal_quantum_numbers)
     blender_obj.data.body = text
 
+@profile
 def edit_magnetic(): 
     '''
     Displays all available magnetic quantum numbers on the UI.
@@ -38,6 +55,11 @@ def edit_magnetic():
     obj = logic.getCurrentController().owner
     blender_obj = obj.blenderObject
 
+    version = GlobalStorage.version(logic.globalDict, "orbitals")
+    if obj.get("orbitals_version", -1) == version:
+        return  # Label is already up to date
+    obj["orbitals_version"] = version
+
     orbital_data = logic.globalDict.get("orbitals", [])
 
     magnetic_quantum_numbers = sorted(set([data["m"] for data in orbital_data]))
@@ -1,9 +1,14 @@
-import math
 from bge import logic
-import numpy as np
-from scripts.global_manager import GlobalConstants
+from scripts.global_manager import GlobalConstants, GlobalStorage, VersionedMemo
+from scripts.circuit import read_state
 # from scripts.global_manager import GlobalControllerManager
+from scripts.profiling import profiler
 
+profile = profiler.profile(lambda: logic.globalDict)
+
+marginals: VersionedMemo = VersionedMemo()
+
+@profile
 def align_qubits() -> None:
     '''
     Aligns qubits to a specific basis.
@@ -14,6 +19,12 @@ def align_qubits() -> None:
 
     selected_index = obj.get("qubit_index", -1)
 
+    read_state(logic.globalDict)  # Apply pending gates before checking the version
+    version = GlobalStorage.version(logic.globalDict, "state_vector")
+    if obj.get("state_vector_version", -1) == version:
+        return  # Scale is already up to date
+    obj["state_vector_version"] = version
+
     max_scale = GlobalConstants.max_scale
 
     superposition = derive_superposition(selected_index)
@@ -29,25 +40,21 @@ def derive_superposition(index: int) -> float:
     '''
     Derives the superposition value for a given qubit index.
     This is useful for quantum state manipulations.
+
+    The value is the probability of measuring the qubit as |1>. Marginals for all
+    qubits are computed together and reused until the state vector's version changes.
     '''
-    ve = logic.globalDict.get("state_vector", np.array([0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0]))
+    state = read_state(logic.globalDict)
 
-    if index < 0 or index >= math.log2(len(ve)):
+    if index < 0 or index >= state.n:
         raise IndexError("Qubit index out of range.")
-    
-    sum: float = 0.0
-    
-    for index, value in enumerate(ve):
-        # Convert to binary array
-        binary_sequence: list[int] = [int(x) for x in bin(index)[2:].zfill(int(math.log2(len(ve))))]
-        if binary_sequence[index] == 1:
-            sum += value
-        else:
-            sum -= value
 
-    return sum
+    version = GlobalStorage.version(logic.globalDict, "state_vector")
+
+    return float(marginals.get(version, state.marginals)[index])
 
 
+@profile
 def select_qubit() -> None:
     '''
     Selects a specific qubit for operations.
@@ -1,10 +1,17 @@
+from typing import TYPE_CHECKING
 from bge import logic
-from scripts.global_manager import GlobalConstants
+from scripts.global_manager import GlobalConstants, GlobalStorage
 # from scripts.global_manager import GlobalControllerManager
 import numpy as np
-from numpy.typing import NDArray
+from scripts.circuit import read_state
 from math import sin, cos, asin
+from scripts.profiling import profiler
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
 
+profile = profiler.profile(lambda: logic.globalDict)
+
+@profile
 def align_state_vector() -> None:
     '''
     Aligns the state vector to a specific basis.
@@ -14,7 +21,12 @@ def align_state_vector() -> None:
     blender_obj = obj.blenderObject
 
     # Rotate the state vector to the desired location around the global origin
-    ve: NDArray[np.float64] = logic.globalDict.get("state_vector", np.array([0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0]))
+    # Only the first eight amplitudes are shown, and only their real parts map to a rotation and color
+    ve: NDArray[np.float64] = read_state(logic.globalDict).amplitude(np.arange(8)).real
+
+    version = GlobalStorage.version(logic.globalDict, "state_vector")
+    if obj.get("aligned_version", -1) == version:
+        return  # Already converged on this state vector
 
     [rx, ry, rz] = blender_obj.rotation_euler # type: ignore
     
@@ -35,6 +47,9 @@ def align_state_vector() -> None:
 
     difference_vector = ve - old_vector
 
+    if np.max(np.abs(difference_vector)) < 1e-4:
+        obj["aligned_version"] = version
+
     # Rotate the blender object slightly in the direction of the difference vector
     adjustment_factor = GlobalConstants.timestep * 5.0  # Small adjustment factor
 
@@ -1,7 +1,10 @@
-from typing import TypedDict
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, Generic, TypedDict, TypeVar
 # from typing import Optional, Callable, Any
-import numpy as np
-from numpy.typing import NDArray
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+
 class OrbitalData(TypedDict):
     n: int
     l: int
@@ -11,18 +14,87 @@ class OrbitalData(TypedDict):
 class GlobalConstants:
     num_particles: int = 20000
     timestep: float = 0.01
+    time_scale: float = 20.0 # Atomic time units per game second
+
+    # Orbital sampling
+    orbital_scale: float = 0.15 # Blender units per Bohr radius
+    sampling_mode: str = "inverse_cdf" # "inverse_cdf", "envelope" or "rejection" (superpositions use the envelope unless "rejection")
+    sample_block_size: int = 65536
+    max_sample_blocks: int = 2000
+    particles_per_frame: int = 4000 # Background sampling batch applied per frame
+    orbital_library: str = "//assets/orbital_library.orbs" # Built by python -m scripts.orbital_library
+    incremental_sweeps: int = 8 # Metropolis sweeps (on the sampler's worker) when one orbital is appended, 0 to always resample
+    cloud_sampler: str = "background" # "background" (one-shot sampling) or "streaming" (persistent walkers)
+    streaming_steps_per_frame: int = 1 # Metropolis sweeps per frame of the streaming walkers
+    streaming_walkers_per_step: int = 5000 # Walkers moved per sweep, rotating through the population
+
+    # Orbital dynamics
+    velocity_grid_resolution: int = 64 # Nodes per axis of the cached velocity field, 0 to evaluate directly
+    integrator: str = "adaptive" # "adaptive", "rk4" or "euler"
+    integration_tolerance: float = 1e-3 # Bohr radii of local error per substep
+    max_substeps: int = 8 # Per particle, per frame
+    integration_time_budget: float = 0.004 # Seconds of integration per frame
+
+    # Measurement
+    measurement_shots: int = 1000 # Shots per histogram of measure_shots
+
+    # Profiling (switched on by logic.globalDict["profiling"])
+    frame_budget: float = 1 / 60 # Seconds per logic tic
+    profile_report_interval: int = 120 # Frames between frame-time summaries
 
     max_scale: float = 0.563
 
 class GlobalStorage:
     # State Vector Storage
-    state_vector: NDArray[np.float64] = np.array([])
+    state_vector: NDArray[np.float64] | None = None # Live value (a StateBackend) is logic.globalDict["state_vector"]
     orbitals: list[OrbitalData] = []
 
     # Qubit Selection
     selected_qubit_one: int = 1
     selected_qubit_two: int = 2
 
+    # Version tracking of the values stored in logic.globalDict (counters live in store["versions"])
+    @staticmethod
+    def version(store: dict[str, Any], key: str) -> int:
+        '''
+        Returns the current version of a tracked value (0 if it was never set).
+        '''
+        return store.get("versions", {}).get(key, 0)
+
+    @staticmethod
+    def set(store: dict[str, Any], key: str, value: Any) -> int:
+        '''
+        Stores a tracked value and increments its version.
+        Returns the new version.
+        '''
+        store[key] = value
+        versions = store.setdefault("versions", {})
+        versions[key] = versions.get(key, 0) + 1
+        return versions[key]
+
+    @staticmethod
+    def changed_since(store: dict[str, Any], key: str, version: int) -> bool:
+        '''
+        Checks whether a tracked value has been set since the given version.
+        '''
+        return GlobalStorage.version(store, key) != version
+
+T = TypeVar("T")
+
+class VersionedMemo(Generic[T]):
+    '''
+    Memoizes a derived value for one version of a tracked value.
+    '''
+    def __init__(self):
+        self.version: int = -1
+        self.value: T | None = None
+
+    def get(self, version: int, compute: Callable[[], T]) -> T:
+        if self.value is None or version != self.version:
+            self.value = compute()
+            self.version = version
+        return self.value
+
 # class GlobalControllerManager:
     
 #     # State Vector Management
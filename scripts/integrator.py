@@ -0,0 +1,137 @@
+import time
+from typing import Callable
+import numpy as np
+from numpy.typing import NDArray
+
+'''
+Vectorized particle integrators for Bohmian trajectories.
+Every function advances all particles at once; a velocity function maps (N, 3) positions to
+(N, 3) velocities. Non-finite velocities (at or next to nodal surfaces) are masked to zero
+instead of being allowed to propagate NaNs into the positions.
+'''
+
+VelocityFunction = Callable[[NDArray[np.float64]], NDArray[np.float64]]
+
+# Bogacki-Shampine 3(2): difference between the third- and second-order weights
+_BS_ERROR = (2 / 9 - 7 / 24, 1 / 3 - 1 / 4, 4 / 9 - 1 / 3, -1 / 8)
+
+def masked_velocity(velocity: VelocityFunction, positions: NDArray[np.float64],
+                    max_speed: float | None = None) -> tuple[NDArray[np.float64], NDArray[np.bool_]]:
+    """Evaluate a velocity function, zeroing non-finite rows and optionally clamping the speed.
+
+    Args:
+        velocity (VelocityFunction): Maps (N, 3) positions to (N, 3) velocities.
+        positions (NDArray[np.float64]): Particle positions of shape (N, 3).
+        max_speed (float | None): Speeds above this are scaled down to it; no clamp if None.
+
+    Returns:
+        tuple: (velocities of shape (N, 3), boolean mask of the rows that were non-finite).
+    """
+    v = velocity(positions)
+    masked = ~np.all(np.isfinite(v), axis=1)
+    v = np.where(masked[:, None], 0.0, v)
+
+    if max_speed is not None:
+        speed = np.linalg.norm(v, axis=1)
+        too_fast = speed > max_speed
+        v[too_fast] *= (max_speed / speed[too_fast])[:, None]
+
+    return v, masked
+
+def euler_step(velocity: VelocityFunction, positions: NDArray[np.float64], dt: float,
+               max_speed: float | None = None) -> tuple[NDArray[np.float64], NDArray[np.bool_]]:
+    """Advance all particles by one explicit Euler step.
+
+    Args:
+        velocity (VelocityFunction): Maps (N, 3) positions to (N, 3) velocities.
+        positions (NDArray[np.float64]): Particle positions of shape (N, 3).
+        dt (float): Time step.
+        max_speed (float | None): Optional speed clamp, see masked_velocity.
+
+    Returns:
+        tuple: (new positions, mask of the particles that hit a non-finite velocity).
+    """
+    v, masked = masked_velocity(velocity, positions, max_speed)
+    return positions + dt * v, masked
+
+def rk4_step(velocity: VelocityFunction, positions: NDArray[np.float64], dt: float,
+             max_speed: float | None = None) -> tuple[NDArray[np.float64], NDArray[np.bool_]]:
+    """Advance all particles by one classical fourth-order Runge-Kutta step.
+
+    Args:
+        velocity (VelocityFunction): Maps (N, 3) positions to (N, 3) velocities.
+        positions (NDArray[np.float64]): Particle positions of shape (N, 3).
+        dt (float): Time step.
+        max_speed (float | None): Optional speed clamp, see masked_velocity.
+
+    Returns:
+        tuple: (new positions, mask of the particles that hit a non-finite velocity in any stage).
+    """
+    k1, m1 = masked_velocity(velocity, positions, max_speed)
+    k2, m2 = masked_velocity(velocity, positions + 0.5 * dt * k1, max_speed)
+    k3, m3 = masked_velocity(velocity, positions + 0.5 * dt * k2, max_speed)
+    k4, m4 = masked_velocity(velocity, positions + dt * k3, max_speed)
+
+    return positions + (dt / 6) * (k1 + 2 * k2 + 2 * k3 + k4), m1 | m2 | m3 | m4
+
+def adaptive_advance(velocity: VelocityFunction, positions: NDArray[np.float64], duration: float,
+                     tolerance: float = 1e-3, max_substeps: int = 8, time_budget: float | None = None,
+                     max_speed: float | None = None) -> tuple[NDArray[np.float64], NDArray[np.int_], NDArray[np.bool_]]:
+    """Advance all particles by duration with per-particle adaptive Bogacki-Shampine 3(2) steps.
+
+    Each particle keeps its own step size. Iterations stop once every particle has covered
+    duration, a particle has used max_substeps attempts, or time_budget seconds of wall time
+    have passed; particles that run out of budget simply end the frame short of duration.
+
+    Args:
+        velocity (VelocityFunction): Maps (N, 3) positions to (N, 3) velocities.
+        positions (NDArray[np.float64]): Particle positions of shape (N, 3).
+        duration (float): Time to advance.
+        tolerance (float): Accepted local error per step, in position units.
+        max_substeps (int): Maximum number of step attempts per particle.
+        time_budget (float | None): Wall-clock limit in seconds; no limit if None.
+        max_speed (float | None): Optional speed clamp, see masked_velocity.
+
+    Returns:
+        tuple: (new positions, substeps attempted per particle, mask of the particles that hit a
+        non-finite velocity).
+    """
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+
+    positions = positions.copy()
+    count = len(positions)
+    remaining = np.full(count, duration)
+    dt = np.full(count, duration)
+    substeps = np.zeros(count, dtype=np.int_)
+    masked = np.zeros(count, dtype=np.bool_)
+
+    while True:
+        active = np.flatnonzero((remaining > 0) & (substeps < max_substeps))
+        if len(active) == 0 or (deadline is not None and time.perf_counter() > deadline):
+            break
+
+        y = positions[active]
+        h = np.minimum(dt[active], remaining[active])[:, None]
+
+        k1, m1 = masked_velocity(velocity, y, max_speed)
+        k2, m2 = masked_velocity(velocity, y + 0.5 * h * k1, max_speed)
+        k3, m3 = masked_velocity(velocity, y + 0.75 * h * k2, max_speed)
+        y_new = y + h * ((2 / 9) * k1 + (1 / 3) * k2 + (4 / 9) * k3)
+        k4, m4 = masked_velocity(velocity, y_new, max_speed)
+
+        e1, e2, e3, e4 = _BS_ERROR
+        error = np.linalg.norm(h * (e1 * k1 + e2 * k2 + e3 * k3 + e4 * k4), axis=1)
+        hit = m1 | m2 | m3 | m4
+
+        accept = error <= tolerance
+        accepted = active[accept]
+        positions[accepted] = y_new[accept]
+        remaining[accepted] -= h[accept, 0]
+        masked[active] |= hit
+        substeps[active] += 1
+
+        # Standard step-size controller for a third-order method
+        factor = 0.9 * (tolerance / np.maximum(error, 1e-300)) ** (1 / 3)
+        dt[active] = h[:, 0] * np.clip(factor, 0.2, 5.0)
+
+    return positions, substeps, masked
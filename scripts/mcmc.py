@@ -0,0 +1,308 @@
+import numpy as np
+from numpy.typing import NDArray
+from scripts.sampling import inverse_cdf_sample, orbital_norm, radial_extent, valid_quantum_numbers
+from scripts.wavefunction import a, wavefunction_batch
+
+'''
+Metropolis-Hastings moves for orbital clouds.
+Instead of resampling from scratch, an existing cloud (in Bohr radii) is moved toward a new
+density with vectorized sweeps: every particle proposes a move at once and each is accepted
+or rejected independently, so any previous cloud serves as a warm start.
+'''
+
+class MetropolisStats:
+    """Acceptance bookkeeping of a run of sweeps.
+
+    Attributes:
+        local_ratios (list[float]): Share of random-walk proposals accepted, per sweep.
+        jump_ratios (list[float]): Share of independence (jump) proposals accepted, per sweep.
+        step_sizes (list[float]): Random-walk step size used in each sweep, in Bohr radii.
+    """
+
+    def __init__(self):
+        self.local_ratios: list[float] = []
+        self.jump_ratios: list[float] = []
+        self.step_sizes: list[float] = []
+
+    @property
+    def accept_ratio(self) -> float:
+        """Mean acceptance over all recorded sweeps and both move types (0.0 if none)."""
+        ratios = self.local_ratios + self.jump_ratios
+        return float(np.mean(ratios)) if ratios else 0.0
+
+def densities(points: NDArray[np.float64],
+              quantum_numbers: list[tuple[int, int, int]]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """Evaluate the superposition density and the density of the mixture of its orbitals together.
+
+    Both come from one evaluation of the orbitals: |sum psi_k|^2 is the target, sum |psi_k|^2 the
+    (unnormalized) density that sample_mixture draws from.
+
+    Args:
+        points (NDArray[np.float64]): Positions of shape (N, 3), in Bohr radii.
+        quantum_numbers (list): Valid quantum numbers (n, l, m) of the superposition.
+
+    Returns:
+        tuple: (superposition density, mixture density), each of shape (N,).
+    """
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+    theta = np.arccos(np.divide(z, r, out=np.ones_like(r), where=r > 0))
+    psi = wavefunction_batch(r * a, theta, np.arctan2(y, x), quantum_numbers)
+
+    total = psi.sum(axis=0)
+    return total.real ** 2 + total.imag ** 2, np.sum(psi.real ** 2 + psi.imag ** 2, axis=0)
+
+def sample_mixture(quantum_numbers: list[tuple[int, int, int]], num_points: int,
+                   rng: np.random.Generator | None = None) -> NDArray[np.float64]:
+    """Draw exact samples of the mixture sum |psi_k|^2 of the orbitals of a superposition.
+
+    Each point picks an orbital with probability proportional to its norm (see orbital_norm) and
+    is drawn from it by inverse CDF. The orbitals of a superposition are orthogonal, so its density
+    is at most len(quantum_numbers) times this mixture's, which makes the mixture a good
+    independence proposal wherever the target has weight.
+
+    Args:
+        quantum_numbers (list): Valid quantum numbers (n, l, m) of the superposition.
+        num_points (int): Number of points to draw.
+        rng (np.random.Generator | None): Random generator, a fresh default_rng() if None.
+
+    Returns:
+        NDArray[np.float64]: Positions of shape (num_points, 3) in random order, in Bohr radii.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    weights = np.array([orbital_norm(*orbital) for orbital in quantum_numbers])
+    counts = rng.multinomial(num_points, weights / weights.sum())
+
+    points = np.concatenate([inverse_cdf_sample(*orbital, int(count), rng=rng)
+                             for orbital, count in zip(quantum_numbers, counts)])
+    return points[rng.permutation(num_points)]
+
+def metropolis_sweep(positions: NDArray[np.float64], current_density: NDArray[np.float64],
+                     current_mixture: NDArray[np.float64], quantum_numbers: list[tuple[int, int, int]],
+                     step_size: float, jump_fraction: float = 0.5,
+                     rng: np.random.Generator | None = None) -> tuple[NDArray[np.float64], NDArray[np.float64],
+                                                                      NDArray[np.float64], float, float]:
+    """Move every particle by one Metropolis-Hastings step toward the superposition density.
+
+    Each particle proposes either a Gaussian random-walk step or, with probability jump_fraction,
+    an independent draw from the mixture of the superposition's orbitals (see sample_mixture).
+    Jumps let particles reach regions far from the old cloud, e.g. the shell of a newly added
+    orbital, and the Hastings correction uses the mixture density, so both moves leave the target
+    invariant.
+
+    Args:
+        positions (NDArray[np.float64]): Particle positions of shape (N, 3), in Bohr radii.
+        current_density (NDArray[np.float64]): Target density at positions (from the previous sweep).
+        current_mixture (NDArray[np.float64]): Mixture density at positions (from the previous sweep).
+        quantum_numbers (list): Valid quantum numbers (n, l, m) of the target superposition.
+        step_size (float): Standard deviation of the random-walk step per axis, in Bohr radii.
+        jump_fraction (float): Share of particles making a jump proposal.
+        rng (np.random.Generator | None): Random generator, a fresh default_rng() if None.
+
+    Returns:
+        tuple: (new positions, target density at them, mixture density at them, random-walk
+        acceptance ratio, jump acceptance ratio).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    count = len(positions)
+    jumping = rng.uniform(0.0, 1.0, count) < jump_fraction
+
+    proposals = positions + rng.normal(0.0, step_size, (count, 3))
+    num_jumps = int(np.count_nonzero(jumping))
+    if num_jumps:
+        proposals[jumping] = sample_mixture(quantum_numbers, num_jumps, rng=rng)
+
+    proposed_density, proposed_mixture = densities(proposals, quantum_numbers)
+
+    # pi(y) / pi(x) for random walks; pi(y) q(x) / (pi(x) q(y)) for independence jumps
+    numerator = np.where(jumping, proposed_density * current_mixture, proposed_density)
+    denominator = np.where(jumping, current_density * proposed_mixture, current_density)
+
+    accepted = rng.uniform(0.0, 1.0, count) * denominator < numerator
+
+    new_positions = np.where(accepted[:, None], proposals, positions)
+    new_density = np.where(accepted, proposed_density, current_density)
+    new_mixture = np.where(accepted, proposed_mixture, current_mixture)
+
+    local_ratio = float(np.mean(accepted[~jumping])) if num_jumps < count else 0.0
+    jump_ratio = float(np.mean(accepted[jumping])) if num_jumps else 0.0
+    return new_positions, new_density, new_mixture, local_ratio, jump_ratio
+
+def metropolis_update(positions: NDArray[np.float64], quantum_numbers: list[tuple[int, int, int]], sweeps: int = 8,
+                      step_size: float | None = None, target_acceptance: float = 0.4, jump_fraction: float = 0.9,
+                      rng: np.random.Generator | None = None) -> tuple[NDArray[np.float64], MetropolisStats]:
+    """Relax an existing cloud toward the density of a (new) superposition.
+
+    The random-walk step size starts at a fraction of the orbital size and is nudged after each
+    sweep toward target_acceptance. A superposition of K orbitals has at most K times the mixture
+    density, so each jump proposal is accepted with probability at least 1/K on average and the
+    share of particles still in the old cloud shrinks geometrically with the sweeps.
+
+    Args:
+        positions (NDArray[np.float64]): Warm-start positions of shape (N, 3), in Bohr radii.
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+        sweeps (int): Number of sweeps.
+        step_size (float | None): Initial random-walk step in Bohr radii, derived from n if None.
+        target_acceptance (float): Random-walk acceptance the step size is tuned toward.
+        jump_fraction (float): Share of particles making a jump proposal in each sweep.
+        rng (np.random.Generator | None): Random generator, a fresh default_rng() if None.
+
+    Returns:
+        tuple: (new positions, MetropolisStats of the sweeps).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    stats = MetropolisStats()
+    quantum_numbers = valid_quantum_numbers(quantum_numbers)
+    if not quantum_numbers or len(positions) == 0:
+        return positions, stats
+
+    if step_size is None:
+        step_size = 0.05 * radial_extent(quantum_numbers)
+
+    current_density, current_mixture = densities(positions, quantum_numbers)
+    for _ in range(sweeps):
+        positions, current_density, current_mixture, local_ratio, jump_ratio = metropolis_sweep(
+            positions, current_density, current_mixture, quantum_numbers, step_size, jump_fraction=jump_fraction, rng=rng)
+
+        stats.local_ratios.append(local_ratio)
+        stats.jump_ratios.append(jump_ratio)
+        stats.step_sizes.append(step_size)
+
+        step_size *= float(np.exp(local_ratio - target_acceptance))
+
+    return positions, stats
+
+def radial_moments(positions: NDArray[np.float64]) -> tuple[float, float]:
+    """Mean and root-mean-square distance from the nucleus of a cloud (0.0, 0.0 if empty)."""
+    if len(positions) == 0:
+        return 0.0, 0.0
+    r = np.linalg.norm(positions, axis=1)
+    return float(np.mean(r)), float(np.sqrt(np.mean(r ** 2)))
+
+def has_converged(positions: NDArray[np.float64], reference: NDArray[np.float64], tolerance: float = 0.05) -> bool:
+    """Check a relaxed cloud against an exact sample of the same density by its radial moments.
+
+    Args:
+        positions (NDArray[np.float64]): The relaxed cloud of shape (N, 3).
+        reference (NDArray[np.float64]): Exact samples of the target density of shape (M, 3).
+        tolerance (float): Largest accepted relative difference of each moment.
+
+    Returns:
+        bool: True if both the mean and the rms radius agree within tolerance.
+    """
+    if len(positions) == 0 or len(reference) == 0:
+        return False
+    return all(abs(moment - expected) <= tolerance * expected
+               for moment, expected in zip(radial_moments(positions), radial_moments(reference)))
+
+class StreamingSampler:
+    """A persistent population of Metropolis walkers that always holds a cloud.
+
+    Every advance() moves a rotating slice of the walkers by a fixed number of sweeps, so the
+    sampling cost is spread evenly over frames. set_target() only changes the stationary
+    distribution: the walkers keep their positions and drift toward the new density, which
+    gives a continuously "shimmering" cloud instead of batches of replaced particles.
+
+    Positions are exchanged in Blender units as float32 (as read_locations returns them). The
+    density of the returned positions is cached, so it is only recomputed for walkers that
+    something else (e.g. the velocity field) has moved in between.
+
+    Attributes:
+        scale (float): Blender units per Bohr radius.
+        quantum_numbers (list): Valid quantum numbers (n, l, m) of the current target.
+        step_size (float): Current random-walk step in Bohr radii, tuned toward target_acceptance.
+        target_acceptance (float): Random-walk acceptance the step size is tuned toward.
+        stats (MetropolisStats): Acceptance of the most recent sweeps (bounded by history).
+    """
+
+    def __init__(self, scale: float = 1.0, target_acceptance: float = 0.4, history: int = 120,
+                 rng: np.random.Generator | None = None):
+        self.scale = scale
+        self.target_acceptance = target_acceptance
+        self.history = history
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.quantum_numbers: list[tuple[int, int, int]] = []
+        self.step_size = 1.0
+        self.stats = MetropolisStats()
+        self._locations: NDArray[np.float32] = np.zeros((0, 3), dtype=np.float32)
+        self._density: NDArray[np.float64] = np.zeros(0)
+        self._mixture: NDArray[np.float64] = np.zeros(0)
+        self._cursor = 0
+
+    def set_target(self, quantum_numbers: list[tuple[int, int, int]]) -> None:
+        """Make the superposition of quantum_numbers the stationary distribution."""
+        quantum_numbers = valid_quantum_numbers(quantum_numbers)
+        if quantum_numbers == self.quantum_numbers:
+            return
+
+        self.quantum_numbers = quantum_numbers
+        if quantum_numbers:
+            self.step_size = 0.05 * radial_extent(quantum_numbers)
+        self._locations = np.zeros((0, 3), dtype=np.float32)  # Cached densities belong to the old target
+
+    def advance(self, locations: NDArray[np.float32], steps: int = 1,
+                walkers: int | None = None) -> NDArray[np.float32]:
+        """Move the walkers toward the current target.
+
+        Args:
+            locations (NDArray[np.float32]): Current particle locations of shape (N, 3), in Blender units.
+            steps (int): Sweeps per call.
+            walkers (int | None): Walkers moved per sweep, continuing where the last sweep stopped; all if None.
+
+        Returns:
+            NDArray[np.float32]: New locations of shape (N, 3), in Blender units.
+        """
+        count = len(locations)
+        if not self.quantum_numbers or count == 0 or steps <= 0:
+            return locations
+
+        locations = np.array(locations, dtype=np.float32)
+        positions = locations.astype(np.float64) / self.scale
+        density, mixture = self._current_densities(locations, positions)
+
+        walkers = count if walkers is None else max(1, min(walkers, count))
+        for _ in range(steps):
+            chosen = (self._cursor + np.arange(walkers)) % count
+            self._cursor = (self._cursor + walkers) % count
+
+            moved, moved_density, moved_mixture, local_ratio, jump_ratio = metropolis_sweep(
+                positions[chosen], density[chosen], mixture[chosen], self.quantum_numbers, self.step_size, rng=self.rng)
+
+            # The float32 rounding of the locations changes the density far below the acceptance noise
+            positions[chosen] = moved
+            locations[chosen] = moved * self.scale
+            density[chosen] = moved_density
+            mixture[chosen] = moved_mixture
+
+            self._record(local_ratio, jump_ratio)
+            self.step_size *= float(np.exp(local_ratio - self.target_acceptance))
+
+        self._locations = locations.copy()
+        self._density = density
+        self._mixture = mixture
+        return locations
+
+    def _current_densities(self, locations: NDArray[np.float32],
+                           positions: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        if self._locations.shape != locations.shape:
+            return densities(positions, self.quantum_numbers)
+
+        density = self._density.copy()
+        mixture = self._mixture.copy()
+        moved = np.any(self._locations != locations, axis=1)
+        if np.any(moved):
+            density[moved], mixture[moved] = densities(positions[moved], self.quantum_numbers)
+        return density, mixture
+
+    def _record(self, local_ratio: float, jump_ratio: float) -> None:
+        self.stats.local_ratios.append(local_ratio)
+        self.stats.jump_ratios.append(jump_ratio)
+        self.stats.step_sizes.append(self.step_size)
+        for ratios in (self.stats.local_ratios, self.stats.jump_ratios, self.stats.step_sizes):
+            del ratios[:-self.history]
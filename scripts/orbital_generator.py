@@ -0,0 +1,181 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator
+import numpy as np
+from numpy.typing import NDArray
+from scripts.sampling import Envelope, valid_quantum_numbers
+
+'''
+Streaming point-cloud generator for hydrogen-like orbitals.
+Replaces the generator cells of tests/orbital_generator.ipynb: points are sampled from the
+density restricted to the box [-n_a, n_a]^3 (in Bohr radii) a block at a time, so memory stays
+constant however many points are requested.
+'''
+
+Region = Callable[[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]], NDArray[np.bool_]]
+
+def generate_points(n: int, l: int, m: int, n_a: float, num_points: int, chunk_size: int = 100000,
+                    block_size: int = 1000000, max_blocks: int = 2000, region: Region | None = None,
+                    rng: np.random.Generator | None = None) -> Iterator[NDArray[np.float64]]:
+    """Generate accepted orbital points as a stream of fixed-size chunks.
+
+    At most max_blocks blocks are drawn, so the generator always terminates (e.g. for a region
+    that excludes the whole cloud); if the budget runs out fewer than num_points points are yielded.
+
+    Args:
+        n (int): Principal quantum number.
+        l (int): Azimuthal quantum number.
+        m (int): Magnetic quantum number.
+        n_a (float): Half-width of the sampled box in Bohr radii.
+        num_points (int): Total number of points to produce.
+        chunk_size (int): Number of points per yielded chunk (the last chunk may be shorter).
+        block_size (int): Number of candidates evaluated per block.
+        max_blocks (int): Maximum number of blocks drawn before giving up.
+        region (Region | None): Optional mask function (x, y, z) -> bool; candidates outside it
+            are discarded, e.g. to cut a section out of the cloud.
+        rng (np.random.Generator | None): Random generator, a fresh default_rng() if None.
+
+    Yields:
+        NDArray[np.float64]: Chunks of accepted positions of shape (chunk_size, 3).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    quantum_numbers = valid_quantum_numbers([(n, l, m)])
+    if not quantum_numbers:
+        raise ValueError(f"Invalid quantum numbers: {(n, l, m)}")
+
+    # Envelope over the ball through the box corners; points outside the box are dropped
+    envelope = Envelope(quantum_numbers, r_max=np.sqrt(3.0) * n_a)
+
+    chunk: NDArray[np.float64] = np.zeros((chunk_size, 3))
+    filled = 0
+    remaining = num_points
+
+    for _ in range(max_blocks):
+        if remaining <= 0:
+            break
+
+        points = envelope.sample(block_size, block_size=block_size, max_blocks=1, rng=rng)
+
+        accepted = np.all(np.abs(points) <= n_a, axis=1)
+        if region is not None:
+            accepted &= region(points[:, 0], points[:, 1], points[:, 2])
+
+        points = points[accepted][:remaining]
+
+        while len(points) > 0:
+            take = min(chunk_size - filled, len(points))
+            chunk[filled:filled + take] = points[:take]
+            points = points[take:]
+            filled += take
+            remaining -= take
+
+            if filled == chunk_size:
+                yield chunk.copy()
+                filled = 0
+
+    if filled > 0:
+        yield chunk[:filled].copy()
+
+def write_csv(path: str, chunks: Iterator[NDArray[np.float64]]) -> int:
+    """Append a stream of point chunks to a CSV file without holding the whole cloud in memory.
+
+    Args:
+        path (str): Output file path.
+        chunks (Iterator[NDArray[np.float64]]): Chunks of positions of shape (k, 3).
+
+    Returns:
+        int: Number of points written.
+    """
+    count = 0
+    with open(path, "w") as file:
+        for chunk in chunks:
+            np.savetxt(file, chunk, delimiter=",")
+            count += len(chunk)
+    return count
+
+def _generate_shard(task: tuple[int, int, int, float, int, int, np.random.SeedSequence, Region | None]) -> NDArray[np.float64]:
+    n, l, m, n_a, num_points, block_size, seed_sequence, region = task
+    chunks = list(generate_points(n, l, m, n_a, num_points, chunk_size=max(num_points, 1), block_size=block_size,
+                                  region=region, rng=np.random.default_rng(seed_sequence)))
+    return np.concatenate(chunks) if chunks else np.zeros((0, 3))
+
+def parallel_chunks(n: int, l: int, m: int, n_a: float, num_points: int, seed: int | None = None,
+                    workers: int | None = None, shard_size: int = 100000, block_size: int = 1000000,
+                    region: Region | None = None) -> Iterator[NDArray[np.float64]]:
+    """Generate an orbital point cloud on a pool of worker processes, yielding one shard at a time.
+
+    The target count is split into shards of shard_size points. Shard i always draws from
+    the i-th child of SeedSequence(seed), and shards are yielded in order, so a given seed
+    produces byte-identical output whatever the number of workers.
+
+    Args:
+        n (int): Principal quantum number.
+        l (int): Azimuthal quantum number.
+        m (int): Magnetic quantum number.
+        n_a (float): Half-width of the sampled box in Bohr radii.
+        num_points (int): Total number of points to produce.
+        seed (int | None): Root seed; fresh OS entropy if None.
+        workers (int | None): Number of worker processes, os.cpu_count() if None; 1 runs in-process.
+        shard_size (int): Number of points produced per task.
+        block_size (int): Number of candidates evaluated per block inside a task.
+        region (Region | None): Optional module-level (picklable) mask function (x, y, z) -> bool.
+
+    Yields:
+        NDArray[np.float64]: Shards of positions of shape (<= shard_size, 3), in Bohr radii.
+    """
+    num_shards = -(-num_points // shard_size)
+    children = np.random.SeedSequence(seed).spawn(num_shards)
+
+    tasks = [(n, l, m, n_a, min(shard_size, num_points - i * shard_size), block_size, child, region)
+             for i, child in enumerate(children)]
+
+    if workers == 1:
+        for task in tasks:
+            yield _generate_shard(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_generate_shard, tasks)
+
+def parallel_generate(n: int, l: int, m: int, n_a: float, num_points: int, seed: int | None = None,
+                      workers: int | None = None, shard_size: int = 100000, block_size: int = 1000000,
+                      region: Region | None = None) -> NDArray[np.float64]:
+    """Generate an orbital point cloud on a pool of worker processes and gather it into one array.
+
+    Replaces running the generator several times and concatenating the CSVs by hand.
+    See parallel_chunks for the meaning of the arguments.
+
+    Returns:
+        NDArray[np.float64]: Positions of shape (<= num_points, 3), in Bohr radii; shorter if a shard
+        runs out of blocks (see generate_points).
+    """
+    shards = list(parallel_chunks(n, l, m, n_a, num_points, seed=seed, workers=workers, shard_size=shard_size,
+                                  block_size=block_size, region=region))
+    return np.concatenate(shards) if shards else np.zeros((0, 3))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a hydrogen-like orbital point cloud.")
+    parser.add_argument("n", type=int)
+    parser.add_argument("l", type=int)
+    parser.add_argument("m", type=int)
+    parser.add_argument("--n-a", type=float, default=70.0, help="Half-width of the sampled box in Bohr radii.")
+    parser.add_argument("--points", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes, 0 for all cores.")
+    parser.add_argument("--output", default=None, help="Output path; a .cloud extension writes the binary point-cloud format.")
+    parser.add_argument("--quantize", action="store_true", help="Store int16 coordinates in a .cloud file.")
+    args = parser.parse_args()
+
+    output = args.output or "orbital_{:d},{:d},{:d}_full.csv".format(args.n, args.l, args.m)
+    stream = parallel_chunks(args.n, args.l, args.m, args.n_a, args.points, seed=args.seed,
+                             workers=args.workers or None)
+    if output.endswith(".cloud"):
+        from scripts.point_cloud import write_cloud
+        # Points are box-filtered to [-n_a, n_a], so no coordinate exceeds n_a
+        print(write_cloud(output, stream, [(args.n, args.l, args.m)], seed=args.seed, quantized=args.quantize,
+                          extent=args.n_a))
+    else:
+        print(write_csv(output, stream))
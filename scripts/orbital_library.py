@@ -0,0 +1,196 @@
+from typing import Iterator
+import warnings
+import numpy as np
+from numpy.typing import NDArray
+from scripts.point_cloud import FLOAT32, INT16, INT16_LIMIT, POINT_DTYPES, decode_points, encode_points
+from scripts.sampling import inverse_cdf_sample, radial_extent
+from scripts.wavefunction import is_valid_orbital
+
+'''
+Precomputed single-orbital clouds.
+save_orbital can only produce n in 1-4, l in 0-3 and m in 0-4, so every single-orbital cloud the
+game shows is known ahead of time. build_library samples each valid combination once into one
+archive: a 64-byte header, an index of (n, l, m, first row, row count) entries and all points as
+one (total, 3) array in the point-cloud encodings. OrbitalLibrary maps it on first use and hands
+out a cloud as a slice of that array, so startup cost does not depend on the library size.
+'''
+
+MAGIC = b"ORBLIBRY"
+FORMAT_VERSION = 1
+
+LIBRARY_HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("encoding", "<u4"),
+    ("num_entries", "<u4"),
+    ("reserved_a", "<u4"),
+    ("step", "<f8"), # Quantization step of INT16 archives, 0 for FLOAT32
+    ("seed", "<i8"), # -1 if unknown
+    ("reserved", "V24")
+])
+
+INDEX_DTYPE = np.dtype([
+    ("n", "<i2"),
+    ("l", "<i2"),
+    ("m", "<i2"),
+    ("reserved", "V2"),
+    ("start", "<u8"),
+    ("count", "<u8")
+])
+
+def reachable_orbitals(n_range: range = range(1, 5), l_range: range = range(0, 4),
+                       m_range: range = range(0, 5)) -> list[tuple[int, int, int]]:
+    """List the valid (n, l, m) combinations save_orbital can produce, in index order."""
+    return [(n, l, m) for n in n_range for l in l_range for m in m_range if is_valid_orbital(n, l, m)]
+
+def _sample_entries(orbitals: list[tuple[int, int, int]], points_per_orbital: int,
+                    seed: int | None) -> Iterator[NDArray[np.float64]]:
+    # Entry i always draws from the i-th child seed, so rebuilding one seed gives the same archive
+    for (n, l, m), child in zip(orbitals, np.random.SeedSequence(seed).spawn(len(orbitals))):
+        yield inverse_cdf_sample(n, l, m, points_per_orbital, rng=np.random.default_rng(child))
+
+def build_library(path: str, points_per_orbital: int = 200000, orbitals: list[tuple[int, int, int]] | None = None,
+                  seed: int | None = 0, quantized: bool = False) -> int:
+    """Sample every orbital once and write the indexed archive.
+
+    Args:
+        path (str): Output archive path.
+        points_per_orbital (int): Points stored per orbital, at least num_particles. Windows of one entry
+            overlap unless this is several times num_particles, see OrbitalLibrary.get.
+        orbitals (list | None): Quantum numbers (n, l, m) to include, reachable_orbitals() if None.
+        seed (int | None): Root seed of the sampling; fresh OS entropy if None.
+        quantized (bool): Store int16 coordinates instead of float32 (half the size).
+
+    Returns:
+        int: Total number of points written.
+    """
+    if orbitals is None:
+        orbitals = reachable_orbitals()
+
+    encoding = INT16 if quantized else FLOAT32
+    step = max(radial_extent(orbitals), 1.0) / INT16_LIMIT if quantized else 0.0
+
+    header = np.zeros((), dtype=LIBRARY_HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = FORMAT_VERSION
+    header["encoding"] = encoding
+    header["num_entries"] = len(orbitals)
+    header["step"] = step
+    header["seed"] = -1 if seed is None else seed
+
+    index = np.zeros(len(orbitals), dtype=INDEX_DTYPE)
+    for i, (n, l, m) in enumerate(orbitals):
+        index[i] = (n, l, m, b"", i * points_per_orbital, points_per_orbital)
+
+    with open(path, "wb") as file:
+        file.write(header.tobytes())
+        file.write(index.tobytes())
+        for points in _sample_entries(orbitals, points_per_orbital, seed):
+            file.write(np.ascontiguousarray(encode_points(points, encoding, step)).tobytes())
+
+    return len(orbitals) * points_per_orbital
+
+class OrbitalLibrary:
+    """Lazily opened archive of precomputed single-orbital clouds.
+
+    Nothing is read until the first lookup; then only the header and index are, and the points
+    stay memory-mapped. A missing or unreadable archive makes every lookup return None, so the
+    caller falls back to sampling; the first such lookup warns, as does the first lookup of each
+    entry too small for the request.
+
+    Attributes:
+        path (str): Archive path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: dict[tuple[int, int, int], tuple[int, int]] | None = None
+        self._points: NDArray | None = None
+        self._encoding = FLOAT32
+        self._step = 0.0
+        self._too_small: set[tuple[int, int, int]] = set()
+
+    def _open(self) -> None:
+        self._entries = {}
+        try:
+            with open(self.path, "rb") as file:
+                header = np.frombuffer(file.read(LIBRARY_HEADER_DTYPE.itemsize), dtype=LIBRARY_HEADER_DTYPE)[0]
+                if header["magic"] != MAGIC or header["version"] != FORMAT_VERSION:
+                    warnings.warn(f"{self.path} is not an orbital library of version {FORMAT_VERSION}; "
+                                  "single orbitals will be sampled instead.", stacklevel=3)
+                    return
+                index = np.frombuffer(file.read(INDEX_DTYPE.itemsize * int(header["num_entries"])), dtype=INDEX_DTYPE)
+
+            total = int(np.sum(index["count"]))
+            if total == 0:
+                warnings.warn(f"The orbital library {self.path} is empty; single orbitals will be sampled instead.",
+                              stacklevel=3)
+                return
+
+            self._encoding = int(header["encoding"])
+            self._step = float(header["step"])
+            offset = LIBRARY_HEADER_DTYPE.itemsize + index.nbytes
+            self._points = np.memmap(self.path, dtype=POINT_DTYPES[self._encoding], mode="r", offset=offset,
+                                     shape=(total, 3))
+        except (OSError, ValueError, IndexError, KeyError) as error:
+            warnings.warn(f"Cannot open the orbital library {self.path} ({error}); single orbitals will be sampled "
+                          "instead. Build it with python -m scripts.orbital_library.", stacklevel=3)
+            return
+
+        self._entries = {(int(e["n"]), int(e["l"]), int(e["m"])): (int(e["start"]), int(e["count"])) for e in index}
+
+    def orbitals(self) -> list[tuple[int, int, int]]:
+        """Quantum numbers of the orbitals in the archive (none if it could not be opened)."""
+        if self._entries is None:
+            self._open()
+        return list(self._entries)
+
+    def get(self, quantum_numbers: tuple[int, int, int], num_points: int,
+            rng: np.random.Generator | None = None) -> NDArray[np.float32] | None:
+        """Take a cloud of one orbital from the archive.
+
+        The points of an entry are independent draws, so any contiguous window of them is a valid
+        cloud, taken at a random start at the cost of one slice. Two windows overlap unless the entry
+        holds several times num_points, so repeated clouds of one orbital share many of their points.
+
+        Args:
+            quantum_numbers (tuple[int, int, int]): The orbital (n, l, m).
+            num_points (int): Number of points wanted.
+            rng (np.random.Generator | None): Random generator for the window start, a fresh default_rng() if None.
+
+        Returns:
+            NDArray[np.float32] | None: Positions of shape (num_points, 3) in Bohr radii, or None if the
+            orbital is not stored or has fewer points.
+        """
+        if self._entries is None:
+            self._open()
+
+        quantum_numbers = tuple(quantum_numbers)
+        entry = self._entries.get(quantum_numbers)
+        if entry is None or self._points is None:
+            return None
+
+        if entry[1] < num_points:
+            if quantum_numbers not in self._too_small:
+                self._too_small.add(quantum_numbers)
+                warnings.warn(f"The orbital library holds {entry[1]} points of {quantum_numbers}, fewer than the "
+                              f"{num_points} requested; it will be sampled instead.", stacklevel=2)
+            return None
+
+        if rng is None:
+            rng = np.random.default_rng()
+
+        start = entry[0] + int(rng.integers(0, entry[1] - num_points + 1))
+        return decode_points(self._points[start:start + num_points], self._encoding, self._step)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute the single-orbital cloud library.")
+    parser.add_argument("--output", default="assets/orbital_library.orbs")
+    parser.add_argument("--points", type=int, default=200000, help="Points per orbital.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quantize", action="store_true", help="Store int16 coordinates instead of float32.")
+    args = parser.parse_args()
+
+    print(build_library(args.output, args.points, seed=args.seed, quantized=args.quantize))
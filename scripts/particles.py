@@ -0,0 +1,31 @@
+from typing import Any
+import numpy as np
+from numpy.typing import NDArray
+
+'''
+Bulk particle I/O.
+Moves a whole Blender particle collection to and from a contiguous float32 (N, 3) array
+with a single foreach_get/foreach_set call instead of touching particles one at a time.
+'''
+
+def read_locations(particles: Any) -> NDArray[np.float32]:
+    """Read the locations of every particle in one bulk call.
+
+    Args:
+        particles (Any): Blender particle collection (particle_systems[i].particles).
+
+    Returns:
+        NDArray[np.float32]: Particle locations of shape (N, 3).
+    """
+    flat = np.empty(len(particles) * 3, dtype=np.float32)
+    particles.foreach_get("location", flat)
+    return flat.reshape(-1, 3)
+
+def write_locations(particles: Any, locations: NDArray[np.floating]) -> None:
+    """Write the locations of every particle in one bulk call.
+
+    Args:
+        particles (Any): Blender particle collection (particle_systems[i].particles).
+        locations (NDArray[np.floating]): Particle locations of shape (N, 3).
+    """
+    particles.foreach_set("location", np.ascontiguousarray(locations, dtype=np.float32).ravel())
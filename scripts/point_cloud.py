@@ -0,0 +1,281 @@
+import itertools
+import re
+import warnings
+from typing import Iterable, Iterator
+import numpy as np
+from numpy.typing import NDArray
+from scripts.sampling import radial_extent
+
+'''
+Binary point-cloud files.
+A file is a 128-byte header (magic, encoding, point count, seed, quantization step and up to
+MAX_ORBITALS quantum numbers) followed by the points as one little-endian (count, 3) array of
+float32, or of int16 multiples of the step. Chunks are appended after the existing data and only
+the header count is rewritten, and open_cloud maps the points with np.memmap, so slicing a
+subset of a large cloud reads only that subset. csv_to_cloud converts the existing CSV files.
+'''
+
+MAGIC = b"ORBCLOUD"
+FORMAT_VERSION = 1
+MAX_ORBITALS = 8
+
+FLOAT32 = 0
+INT16 = 1
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("encoding", "<u4"),
+    ("count", "<u8"),
+    ("seed", "<i8"), # -1 if unknown
+    ("step", "<f8"), # Quantization step of INT16 files, 0 for FLOAT32
+    ("num_orbitals", "<u4"),
+    ("quantum_numbers", "<i2", (MAX_ORBITALS, 3)),
+    ("reserved", "V36")
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+POINT_DTYPES = {FLOAT32: np.dtype("<f4"), INT16: np.dtype("<i2")}
+INT16_LIMIT = 32767
+
+class PointCloud:
+    """A memory-mapped point-cloud file.
+
+    Attributes:
+        quantum_numbers (list): Quantum numbers (n, l, m) of the orbitals the cloud was sampled from.
+        seed (int | None): Root seed of the sampling run, if known.
+        encoding (int): FLOAT32 or INT16.
+        step (float): Quantization step of INT16 coordinates.
+        raw (NDArray): Stored coordinates of shape (count, 3), memory-mapped read-only.
+    """
+
+    def __init__(self, path: str):
+        header = read_header(path)
+        self.path = path
+        self.quantum_numbers = [tuple(int(q) for q in qn) for qn in header["quantum_numbers"][:header["num_orbitals"]]]
+        self.seed = int(header["seed"]) if header["seed"] >= 0 else None
+        self.encoding = int(header["encoding"])
+        self.step = float(header["step"])
+
+        count = int(header["count"])
+        dtype = POINT_DTYPES[self.encoding]
+        if count == 0:
+            self.raw = np.zeros((0, 3), dtype=dtype)
+        else:
+            self.raw = np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count, 3))
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def points(self, start: int = 0, stop: int | None = None) -> NDArray[np.float32]:
+        """Return points start to stop as float32.
+
+        FLOAT32 clouds return a view of the mapped file without copying; INT16 clouds are
+        dequantized, which copies only the requested slice.
+        """
+        return decode_points(self.raw[start:stop], self.encoding, self.step)
+
+def encode_points(points: NDArray[np.floating], encoding: int, step: float = 0.0) -> NDArray:
+    """Convert positions to the stored coordinates of the given encoding.
+
+    INT16 coordinates beyond the extent are clipped to it, with a warning giving the number of points moved.
+    """
+    if encoding == INT16:
+        scaled = np.rint(points / step)
+        clipped = int(np.count_nonzero(np.any(np.abs(scaled) > INT16_LIMIT, axis=1)))
+        if clipped:
+            warnings.warn(f"{clipped} of {len(scaled)} points lie beyond the quantization extent "
+                          f"{step * INT16_LIMIT:g} and were clipped to it.", stacklevel=2)
+        return np.clip(scaled, -INT16_LIMIT, INT16_LIMIT).astype(POINT_DTYPES[INT16])
+    return np.asarray(points, dtype=POINT_DTYPES[FLOAT32])
+
+def decode_points(raw: NDArray, encoding: int, step: float = 0.0) -> NDArray[np.float32]:
+    """Convert stored coordinates back to float32 positions; FLOAT32 data is returned as is."""
+    if encoding == INT16:
+        return raw.astype(np.float32) * np.float32(step)
+    return raw
+
+def _header(quantum_numbers: list[tuple[int, int, int]], seed: int | None, encoding: int, step: float) -> NDArray:
+    if len(quantum_numbers) > MAX_ORBITALS:
+        raise ValueError(f"A point-cloud header holds at most {MAX_ORBITALS} orbitals, got {len(quantum_numbers)}.")
+
+    header = np.zeros((), dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = FORMAT_VERSION
+    header["encoding"] = encoding
+    header["seed"] = -1 if seed is None else seed
+    header["step"] = step
+    header["num_orbitals"] = len(quantum_numbers)
+    if quantum_numbers:
+        header["quantum_numbers"][:len(quantum_numbers)] = quantum_numbers
+    return header
+
+def read_header(path: str) -> NDArray:
+    """Read and validate the header of a point-cloud file.
+
+    Returns:
+        NDArray: A 0-d structured array of HEADER_DTYPE.
+    """
+    with open(path, "rb") as file:
+        data = file.read(HEADER_SIZE)
+
+    if len(data) < HEADER_SIZE or data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a point-cloud file.")
+
+    header = np.frombuffer(data, dtype=HEADER_DTYPE)[0]
+    if header["version"] != FORMAT_VERSION or header["encoding"] not in POINT_DTYPES:
+        raise ValueError(f"{path} has unsupported version {header['version']} or encoding {header['encoding']}.")
+    return header
+
+def create_cloud(path: str, quantum_numbers: list[tuple[int, int, int]], seed: int | None = None,
+                 quantized: bool = False, extent: float | None = None) -> None:
+    """Create an empty point-cloud file, replacing any existing one.
+
+    Args:
+        path (str): Output file path.
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+        seed (int | None): Root seed of the sampling run, if known.
+        quantized (bool): Store int16 coordinates instead of float32 (half the size).
+        extent (float | None): Largest coordinate magnitude of a quantized cloud; larger ones are clipped.
+            Derived from the quantum numbers if None.
+    """
+    with open(path, "wb") as file:
+        file.write(_new_header(quantum_numbers, seed, quantized, extent).tobytes())
+
+def _new_header(quantum_numbers: list[tuple[int, int, int]], seed: int | None, quantized: bool,
+                extent: float | None) -> NDArray:
+    step = 0.0
+    if quantized:
+        if extent is None:
+            if not quantum_numbers:
+                raise ValueError("A quantized cloud without quantum numbers needs an explicit extent.")
+            extent = radial_extent(quantum_numbers)
+        step = extent / INT16_LIMIT
+
+    return _header(quantum_numbers, seed, INT16 if quantized else FLOAT32, step)
+
+def append_points(path: str, points: NDArray[np.floating]) -> int:
+    """Append points to an existing point-cloud file without rewriting the stored ones.
+
+    The points are written first and the header count last, so an interrupted append leaves
+    the file at its previous count.
+
+    Args:
+        path (str): Point-cloud file path.
+        points (NDArray[np.floating]): Positions of shape (k, 3).
+
+    Returns:
+        int: The new number of points in the file.
+    """
+    header = read_header(path)
+    encoding = int(header["encoding"])
+    count = int(header["count"])
+
+    data = encode_points(points, encoding, float(header["step"]))
+
+    with open(path, "r+b") as file:
+        file.seek(HEADER_SIZE + count * 3 * POINT_DTYPES[encoding].itemsize)
+        file.truncate() # Drop the tail of an interrupted append
+        file.write(np.ascontiguousarray(data).tobytes())
+
+        count += len(data)
+        file.seek(HEADER_DTYPE.fields["count"][1])
+        file.write(np.array(count, dtype="<u8").tobytes())
+
+    return count
+
+def write_cloud(path: str, chunks: Iterable[NDArray[np.floating]], quantum_numbers: list[tuple[int, int, int]],
+                seed: int | None = None, quantized: bool = False, extent: float | None = None) -> int:
+    """Write a stream of point chunks to a new point-cloud file, the binary counterpart of write_csv.
+
+    The file stays open for the whole stream and the header count is written once at the end,
+    so an interrupted write leaves a file with a count of zero.
+
+    Args:
+        path (str): Output file path.
+        chunks (Iterable[NDArray[np.floating]]): Chunks of positions of shape (k, 3).
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+        seed (int | None): Root seed of the sampling run, if known.
+        quantized (bool): Store int16 coordinates instead of float32.
+        extent (float | None): Largest coordinate magnitude of a quantized cloud, see create_cloud.
+
+    Returns:
+        int: Number of points written.
+    """
+    header = _new_header(quantum_numbers, seed, quantized, extent)
+    encoding = int(header["encoding"])
+    step = float(header["step"])
+
+    count = 0
+    with open(path, "wb") as file:
+        file.write(header.tobytes())
+        for chunk in chunks:
+            data = encode_points(chunk, encoding, step)
+            file.write(np.ascontiguousarray(data).tobytes())
+            count += len(data)
+
+        file.seek(HEADER_DTYPE.fields["count"][1])
+        file.write(np.array(count, dtype="<u8").tobytes())
+
+    return count
+
+def open_cloud(path: str) -> PointCloud:
+    """Memory-map a point-cloud file; no point is read until it is sliced."""
+    return PointCloud(path)
+
+def read_csv_chunks(path: str, chunk_rows: int = 1000000) -> Iterator[NDArray[np.float64]]:
+    """Read a comma-separated x,y,z file a chunk of rows at a time.
+
+    Yields:
+        NDArray[np.float64]: Chunks of positions of shape (k, 3).
+    """
+    with open(path) as file:
+        while True:
+            lines = list(itertools.islice(file, chunk_rows))
+            if not lines:
+                return
+            yield np.loadtxt(lines, delimiter=",", ndmin=2)
+
+def quantum_numbers_from_name(path: str) -> list[tuple[int, int, int]]:
+    """Parse the quantum numbers from a generator file name such as orbital_6,1,0_full.csv (none if absent)."""
+    match = re.search(r"orbital_(\d+),(\d+),(-?\d+)", path)
+    return [tuple(int(q) for q in match.groups())] if match else []
+
+def csv_to_cloud(csv_path: str, cloud_path: str, quantum_numbers: list[tuple[int, int, int]] | None = None,
+                 seed: int | None = None, quantized: bool = False, extent: float | None = None,
+                 chunk_rows: int = 1000000) -> int:
+    """Convert a CSV point cloud (electron_positions.csv or a notebook output) to a point-cloud file.
+
+    Args:
+        csv_path (str): Input CSV with one x,y,z row per point.
+        cloud_path (str): Output point-cloud file path.
+        quantum_numbers (list | None): Quantum numbers of the cloud, parsed from the file name if None.
+        seed (int | None): Root seed of the sampling run, if known.
+        quantized (bool): Store int16 coordinates instead of float32.
+        extent (float | None): Largest coordinate magnitude of a quantized cloud, see create_cloud.
+        chunk_rows (int): Number of CSV rows converted at a time.
+
+    Returns:
+        int: Number of points written.
+    """
+    if quantum_numbers is None:
+        quantum_numbers = quantum_numbers_from_name(csv_path)
+
+    return write_cloud(cloud_path, read_csv_chunks(csv_path, chunk_rows), quantum_numbers, seed=seed,
+                       quantized=quantized, extent=extent)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert a CSV point cloud to the binary point-cloud format.")
+    parser.add_argument("csv")
+    parser.add_argument("output")
+    parser.add_argument("--orbital", type=int, nargs=3, action="append", metavar=("N", "L", "M"),
+                        help="Quantum numbers of an orbital of the cloud (repeatable); parsed from the file name if omitted.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--quantize", action="store_true", help="Store int16 coordinates instead of float32.")
+    parser.add_argument("--extent", type=float, default=None, help="Largest coordinate magnitude of a quantized cloud.")
+    args = parser.parse_args()
+
+    orbitals = [tuple(orbital) for orbital in args.orbital] if args.orbital else None
+    print(csv_to_cloud(args.csv, args.output, orbitals, seed=args.seed, quantized=args.quantize, extent=args.extent))
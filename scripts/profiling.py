@@ -0,0 +1,145 @@
+import functools
+import time
+from typing import Any, Callable, TypeVar
+
+'''
+Frame-time instrumentation for logic brick entry points.
+Each profiled controller records its wall time into a fixed-size ring buffer, but only while
+the store's "profiling" flag is set; when it is off the wrapper costs one call and one lookup.
+Pure Python, so bricks that do not otherwise need NumPy do not load it for this.
+'''
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+profiling_flag = "profiling"
+
+class RingBuffer:
+    """Fixed-size buffer keeping the most recent samples.
+
+    Attributes:
+        samples (list[float]): Storage of length capacity.
+        count (int): Total number of samples ever recorded.
+    """
+
+    def __init__(self, capacity: int):
+        self.samples: list[float] = [0.0] * capacity
+        self.count = 0
+
+    def append(self, value: float) -> None:
+        self.samples[self.count % len(self.samples)] = value
+        self.count += 1
+
+    def values(self) -> list[float]:
+        """Return the retained samples (in storage order, not time order)."""
+        return self.samples[:min(self.count, len(self.samples))]
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Linearly interpolated percentile of an ascending, non-empty list (fraction in [0, 1])."""
+    position = fraction * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+class FrameProfiler:
+    """Per-controller wall-time recorder.
+
+    Attributes:
+        capacity (int): Number of calls retained per controller.
+        buffers (dict): Ring buffer of call durations in seconds, keyed by controller name.
+    """
+
+    def __init__(self, capacity: int = 240):
+        self.capacity = capacity
+        self.buffers: dict[str, RingBuffer] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            buffer = self.buffers[name] = RingBuffer(self.capacity)
+        buffer.append(seconds)
+
+    def profile(self, store: Callable[[], dict[str, Any]]) -> Callable[[F], F]:
+        """Build a decorator that times a controller while the store's profiling_flag is truthy.
+
+        Args:
+            store (Callable): Returns the shared state dictionary holding the flag, e.g.
+                lambda: logic.globalDict. It is called on every run, because scenes and their
+                globalDict can be replaced while the game is running.
+
+        Returns:
+            Callable: Decorator recording under "<module>.<function>".
+        """
+        def decorator(function: F) -> F:
+            name = f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"
+
+            @functools.wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not store().get(profiling_flag, False):
+                    return function(*args, **kwargs)
+
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+
+            return wrapper # type: ignore
+
+        return decorator
+
+    def section(self, name: str, store: Callable[[], dict[str, Any]]) -> "ProfiledSection":
+        """Context manager timing an arbitrary block under the given name, with the same flag check."""
+        return ProfiledSection(self, name, store)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Summarize every controller's retained calls.
+
+        Returns:
+            dict: Per controller name, the number of calls ever recorded and the p50, p95 and
+            max of the retained durations in milliseconds.
+        """
+        summary = {}
+        for name, buffer in self.buffers.items():
+            values = sorted(value * 1000 for value in buffer.values())
+            summary[name] = {"calls": buffer.count, "p50": percentile(values, 0.5), "p95": percentile(values, 0.95),
+                             "max": values[-1]}
+        return summary
+
+    def summary(self, frame_budget: float | None = None) -> str:
+        """Format the stats as text, slowest p95 first.
+
+        Args:
+            frame_budget (float | None): Frame time in seconds; adds each p95 as a share of it.
+
+        Returns:
+            str: One line per controller.
+        """
+        lines = []
+        for name, stats in sorted(self.stats().items(), key=lambda item: -item[1]["p95"]):
+            line = f"{name}: p50 {stats['p50']:.2f} ms, p95 {stats['p95']:.2f} ms, max {stats['max']:.2f} ms"
+            if frame_budget:
+                line += f" ({stats['p95'] / (frame_budget * 1000):.0%} of frame)"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        self.buffers.clear()
+
+class ProfiledSection:
+    """Context manager returned by FrameProfiler.section."""
+
+    def __init__(self, profiler: FrameProfiler, name: str, store: Callable[[], dict[str, Any]]):
+        self.profiler = profiler
+        self.name = name
+        self.store = store
+        self.start: float | None = None
+
+    def __enter__(self) -> "ProfiledSection":
+        self.start = time.perf_counter() if self.store().get(profiling_flag, False) else None
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self.start is not None:
+            self.profiler.record(self.name, time.perf_counter() - self.start)
+
+profiler = FrameProfiler()
@@ -0,0 +1,197 @@
+from functools import lru_cache
+import numpy as np
+from numpy.typing import NDArray
+
+'''
+State-vector engine.
+A state of n qubits is viewed as a tensor of shape (2,)*n with qubit 0 on the first
+(most significant) axis, the same ordering np.kron uses. Gates are applied by contracting
+their matrix with the target axes only, so the full 2^n x 2^n operator is never built.
+'''
+
+def num_qubits(state_vector: NDArray[np.complex128]) -> int:
+    """Derive the number of qubits from the length of a state vector.
+
+    Args:
+        state_vector (NDArray[np.complex128]): State vector of length 2^n.
+
+    Returns:
+        int: The number of qubits n.
+    """
+    length = len(state_vector)
+    if length == 0 or length & (length - 1):
+        raise ValueError(f"State vector length {length} is not a power of two.")
+    return length.bit_length() - 1
+
+def apply_gate_to_qubits(state_vector: NDArray[np.complex128], gate: NDArray[np.complex128],
+                         qubits: list[int]) -> NDArray[np.complex128]:
+    """Apply a k-qubit gate to the given target qubits by tensor contraction.
+
+    Args:
+        state_vector (NDArray[np.complex128]): State vector of length 2^n.
+        gate (NDArray[np.complex128]): Gate matrix of shape (2^k, 2^k); its first target is the most significant.
+        qubits (list[int]): The k distinct target qubit indices (0-based).
+
+    Returns:
+        NDArray[np.complex128]: The new state vector.
+    """
+    n = num_qubits(state_vector)
+    k = len(qubits)
+
+    if len(set(qubits)) != k or any(q < 0 or q >= n for q in qubits):
+        raise IndexError(f"Invalid target qubits {qubits} for a {n}-qubit state.")
+    if gate.shape != (2 ** k, 2 ** k):
+        raise ValueError(f"Gate of shape {gate.shape} does not act on {k} qubits.")
+
+    psi = state_vector.reshape((2,) * n)
+    tensor = gate.reshape((2,) * (2 * k))
+
+    # Contract the gate's input axes with the target axes; the output axes land first
+    result = np.tensordot(tensor, psi, axes=(list(range(k, 2 * k)), qubits))
+    result = np.moveaxis(result, list(range(k)), qubits)
+
+    return result.reshape(-1)
+
+def apply_single_qubit_gate(state_vector: NDArray[np.complex128], gate: NDArray[np.complex128],
+                            qubit: int) -> NDArray[np.complex128]:
+    """Apply a 2x2 gate to one qubit.
+
+    Args:
+        state_vector (NDArray[np.complex128]): State vector of length 2^n.
+        gate (NDArray[np.complex128]): Gate matrix of shape (2, 2).
+        qubit (int): Target qubit index (0-based).
+
+    Returns:
+        NDArray[np.complex128]: The new state vector.
+    """
+    return apply_gate_to_qubits(state_vector, gate, [qubit])
+
+def apply_two_qubit_gate(state_vector: NDArray[np.complex128], gate: NDArray[np.complex128],
+                         qubit_one: int, qubit_two: int) -> NDArray[np.complex128]:
+    """Apply a 4x4 gate to two qubits.
+
+    Args:
+        state_vector (NDArray[np.complex128]): State vector of length 2^n.
+        gate (NDArray[np.complex128]): Gate matrix of shape (4, 4) in the basis |qubit_one qubit_two>.
+        qubit_one (int): First target qubit (the control for CNOT).
+        qubit_two (int): Second target qubit.
+
+    Returns:
+        NDArray[np.complex128]: The new state vector.
+    """
+    return apply_gate_to_qubits(state_vector, gate, [qubit_one, qubit_two])
+
+@lru_cache(maxsize=32)
+def qubit_bit_masks(n: int) -> NDArray[np.float64]:
+    """Tabulate the bit of every qubit in every basis index.
+
+    Args:
+        n (int): Number of qubits.
+
+    Returns:
+        NDArray[np.float64]: Matrix of shape (2^n, n) whose entry [i, q] is bit q (qubit 0 most significant) of i.
+    """
+    shifts = n - 1 - np.arange(n)
+    masks = ((np.arange(2 ** n)[:, None] >> shifts) & 1).astype(np.float64)
+    masks.flags.writeable = False
+    return masks
+
+def qubit_marginals(state_vector: NDArray[np.complex128]) -> NDArray[np.float64]:
+    """Compute the probability of measuring |1> on every qubit in one pass.
+
+    Args:
+        state_vector (NDArray[np.complex128]): State vector of length 2^n.
+
+    Returns:
+        NDArray[np.float64]: Array of length n with P(qubit q = 1).
+    """
+    probabilities = np.abs(state_vector) ** 2
+    total = probabilities.sum()
+    if total > 0:
+        probabilities = probabilities / total
+
+    return probabilities @ qubit_bit_masks(num_qubits(state_vector))
+
+def measurement_cdf(state_vector: NDArray[np.complex128]) -> NDArray[np.float64]:
+    """Build the normalized cumulative distribution of computational-basis outcomes.
+
+    Build it once per state and reuse it for any number of draws with sample_outcomes.
+
+    Args:
+        state_vector (NDArray[np.complex128]): State vector of length 2^n.
+
+    Returns:
+        NDArray[np.float64]: Read-only array of length 2^n ending in 1.
+    """
+    return _cumulative(np.abs(state_vector) ** 2)
+
+def _cumulative(probabilities: NDArray[np.float64]) -> NDArray[np.float64]:
+    cdf = np.cumsum(probabilities)
+    if cdf[-1] <= 0:
+        raise ValueError("Cannot measure a zero state vector.")
+
+    cdf /= cdf[-1]
+    cdf.flags.writeable = False
+    return cdf
+
+def sample_outcomes(cdf: NDArray[np.float64], shots: int,
+                    rng: np.random.Generator | None = None) -> NDArray[np.int_]:
+    """Draw measurement outcomes by inverting a cumulative distribution.
+
+    Args:
+        cdf (NDArray[np.float64]): Cumulative distribution from measurement_cdf.
+        shots (int): Number of outcomes to draw.
+        rng (np.random.Generator | None): Random generator; a fresh one if None.
+
+    Returns:
+        NDArray[np.int_]: Basis indices of length shots.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    # side="right" never lands on a zero-probability index (its cdf step has zero width)
+    return np.minimum(np.searchsorted(cdf, rng.random(shots), side="right"), len(cdf) - 1)
+
+def outcome_counts(cdf: NDArray[np.float64], shots: int, rng: np.random.Generator | None = None) -> NDArray[np.int_]:
+    """Histogram of shots measurements of every qubit.
+
+    Args:
+        cdf (NDArray[np.float64]): Cumulative distribution from measurement_cdf.
+        shots (int): Number of measurements.
+        rng (np.random.Generator | None): Random generator; a fresh one if None.
+
+    Returns:
+        NDArray[np.int_]: Count per basis index, of length 2^n.
+    """
+    return np.bincount(sample_outcomes(cdf, shots, rng), minlength=len(cdf))
+
+def measure_qubits(state_vector: NDArray[np.complex128], qubits: list[int],
+                   rng: np.random.Generator | None = None) -> tuple[int, NDArray[np.complex128]]:
+    """Measure some qubits and collapse the state onto the observed outcome.
+
+    The selected axes are moved to the front, so each outcome is one row of a (2^k, 2^(n-k))
+    view; the post-measurement state keeps that row, renormalized, and zeroes the others.
+
+    Args:
+        state_vector (NDArray[np.complex128]): State vector of length 2^n.
+        qubits (list[int]): The k distinct qubits to measure (0-based).
+        rng (np.random.Generator | None): Random generator; a fresh one if None.
+
+    Returns:
+        tuple: (outcome as an integer with qubits[0] most significant, post-measurement state vector).
+    """
+    n = num_qubits(state_vector)
+    k = len(qubits)
+
+    if k == 0 or len(set(qubits)) != k or any(q < 0 or q >= n for q in qubits):
+        raise IndexError(f"Invalid measured qubits {qubits} for a {n}-qubit state.")
+
+    psi = np.moveaxis(state_vector.reshape((2,) * n), qubits, list(range(k)))
+    rows = psi.reshape(2 ** k, -1)
+    probabilities = np.sum(np.abs(rows) ** 2, axis=1)
+
+    outcome = int(sample_outcomes(_cumulative(probabilities), 1, rng)[0])
+
+    collapsed = np.zeros_like(rows)
+    collapsed[outcome] = rows[outcome] / np.sqrt(probabilities[outcome])
+    collapsed = np.moveaxis(collapsed.reshape(psi.shape), list(range(k)), qubits)
+
+    return outcome, collapsed.reshape(-1)
@@ -0,0 +1,487 @@
+from functools import lru_cache
+import threading
+import numpy as np
+from numpy.typing import NDArray
+from scripts.wavefunction import a, probability_density, is_valid_orbital, radial_wavefunction, spherical_harmonic
+
+'''
+Position sampling for hydrogen-like orbital clouds.
+All lengths in this module are in units of the Bohr radius.
+'''
+
+# Sampling modes
+REJECTION = "rejection"
+INVERSE_CDF = "inverse_cdf"
+ENVELOPE = "envelope"
+
+# Resolution of the tabulated inverse-CDF tables
+radial_table_size = 8192
+theta_table_size = 2048
+
+def radial_extent(quantum_numbers: list[tuple[int, int, int]]) -> float:
+    """Estimate a radius (in Bohr radii) that encloses practically all of the probability.
+
+    Args:
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+
+    Returns:
+        float: Sampling radius for the superposition.
+    """
+    n_max = max((n for (n, _, _) in quantum_numbers), default=1)
+    return float(n_max * (2 * n_max + 6))
+
+def valid_quantum_numbers(quantum_numbers: list[tuple[int, int, int]]) -> list[tuple[int, int, int]]:
+    """Drop the (n, l, m) combinations that do not describe a physical orbital.
+
+    Args:
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+
+    Returns:
+        list: The valid quantum numbers, in their original order.
+    """
+    return [(n, l, m) for (n, l, m) in quantum_numbers if is_valid_orbital(n, l, m)]
+
+def density(r: NDArray[np.float64], theta: NDArray[np.float64], phi: NDArray[np.float64],
+            quantum_numbers: list[tuple[int, int, int]]) -> NDArray[np.float64]:
+    """Evaluate the (unnormalized) probability density with r given in Bohr radii.
+
+    Args:
+        r, theta, phi (NDArray[np.float64]): Radial (Bohr radii) and angular coordinates.
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+
+    Returns:
+        NDArray[np.float64]: Probability density at the given coordinates.
+    """
+    return probability_density(r * a, theta, phi, quantum_numbers)
+
+def cartesian_density(points: NDArray[np.float64], quantum_numbers: list[tuple[int, int, int]]) -> NDArray[np.float64]:
+    """Evaluate the (unnormalized) probability density at Cartesian positions given in Bohr radii.
+
+    Args:
+        points (NDArray[np.float64]): Positions of shape (N, 3).
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+
+    Returns:
+        NDArray[np.float64]: Probability density at each position.
+    """
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+    theta = np.arccos(np.divide(z, r, out=np.ones_like(r), where=r > 0))
+    return density(r, theta, np.arctan2(y, x), quantum_numbers)
+
+def spherical_to_cartesian_points(r: NDArray[np.float64], theta: NDArray[np.float64],
+                                  phi: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Stack spherical coordinates into an (N, 3) array of Cartesian positions.
+
+    Args:
+        r, theta, phi (NDArray[np.float64]): Spherical coordinates.
+
+    Returns:
+        NDArray[np.float64]: Cartesian positions of shape (N, 3).
+    """
+    sin_theta = np.sin(theta)
+    return np.stack((r * sin_theta * np.cos(phi), r * sin_theta * np.sin(phi), r * np.cos(theta)), axis=1)
+
+def density_bound(quantum_numbers: list[tuple[int, int, int]], r_max: float,
+                  safety: float = 1.05) -> float:
+    """Estimate an upper bound of the probability density inside a ball of radius r_max.
+
+    Scans a coarse (r, theta, phi) grid and pads the maximum by a safety factor,
+    as the original generator notebook does.
+
+    Args:
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+        r_max (float): Radius of the sampled ball in Bohr radii.
+        safety (float): Multiplicative padding applied to the scanned maximum.
+
+    Returns:
+        float: Upper bound of the density, 0.0 if the density vanishes everywhere.
+    """
+    if not quantum_numbers:
+        return 0.0
+
+    # A single orbital (or orbitals sharing m) has no phi dependence in |psi|^2
+    num_phi = 1 if len({m for (_, _, m) in quantum_numbers}) == 1 else 24
+
+    r = np.linspace(0.0, r_max, max(int(r_max * 25), 200))
+    theta = np.linspace(0.0, np.pi, 90)
+    phi = np.linspace(0.0, 2 * np.pi, num_phi, endpoint=False)
+
+    bound = 0.0
+    for phi_value in phi:
+        r_grid, theta_grid = np.meshgrid(r, theta, indexing="ij")
+        values = density(r_grid.ravel(), theta_grid.ravel(), np.full(r_grid.size, phi_value), quantum_numbers)
+        bound = max(bound, float(np.max(values)))
+
+    return safety * bound
+
+def rejection_sample(quantum_numbers: list[tuple[int, int, int]], num_points: int,
+                     r_max: float | None = None, block_size: int = 65536, max_blocks: int = 2000,
+                     rng: np.random.Generator | None = None, bound: float | None = None) -> NDArray[np.float64]:
+    """Sample Cartesian positions from the superposition density by batched rejection sampling.
+
+    Candidates are drawn uniformly inside a ball of radius r_max in blocks of block_size,
+    the density is evaluated for a whole block at once, and the accepted points are kept
+    until num_points have been collected. At most max_blocks blocks are drawn, so the
+    sampler always terminates; if the budget runs out fewer than num_points rows are returned.
+
+    Args:
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+        num_points (int): Target number of accepted points.
+        r_max (float | None): Radius of the sampled ball in Bohr radii, estimated from n if None.
+        block_size (int): Number of candidates evaluated per block.
+        max_blocks (int): Maximum number of blocks drawn before giving up.
+        rng (np.random.Generator | None): Random generator, a fresh default_rng() if None.
+        bound (float | None): Precomputed density_bound for the same r_max, scanned if None.
+
+    Returns:
+        NDArray[np.float64]: Accepted positions of shape (<= num_points, 3), in Bohr radii.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    quantum_numbers = valid_quantum_numbers(quantum_numbers)
+    if r_max is None:
+        r_max = radial_extent(quantum_numbers)
+
+    positions: NDArray[np.float64] = np.zeros((num_points, 3))
+
+    if bound is None:
+        bound = density_bound(quantum_numbers, r_max)
+    if num_points <= 0 or bound <= 0.0:
+        return positions[:0]
+
+    num_accepted = 0
+    for _ in range(max_blocks):
+        # Uniform in the ball: r ~ r_max * u^(1/3), cos(theta) ~ U(-1, 1), phi ~ U(0, 2pi)
+        r = r_max * np.cbrt(rng.uniform(0.0, 1.0, block_size))
+        theta = np.arccos(rng.uniform(-1.0, 1.0, block_size))
+        phi = rng.uniform(0.0, 2 * np.pi, block_size)
+
+        accepted = rng.uniform(0.0, bound, block_size) <= density(r, theta, phi, quantum_numbers)
+
+        take = min(int(np.count_nonzero(accepted)), num_points - num_accepted)
+        r, theta, phi = r[accepted][:take], theta[accepted][:take], phi[accepted][:take]
+
+        positions[num_accepted:num_accepted + take] = spherical_to_cartesian_points(r, theta, phi)
+
+        num_accepted += take
+        if num_accepted >= num_points:
+            break
+
+    return positions[:num_accepted]
+
+def _cell_maxima(values: NDArray[np.float64], axis: int, refine: int) -> NDArray[np.float64]:
+    """Reduce cells*refine + 1 grid nodes along one axis to the maximum over each cell's nodes (edges included)."""
+    values = np.moveaxis(values, axis, 0)
+    cells = (len(values) - 1) // refine
+    inner = values[:-1].reshape((cells, refine) + values.shape[1:]).max(axis=1)
+    return np.moveaxis(np.maximum(inner, values[refine::refine]), 0, axis)
+
+class Envelope:
+    """Piecewise-constant upper bound of the density over (r, theta, phi) cells, for rejection sampling.
+
+    Candidates are drawn cell by cell in proportion to each cell's bound times its volume, so
+    almost no candidates land in empty space. A cell's bound is the maximum of the density on a
+    refine^3 grid of nodes covering it, padded by a safety factor. Shells are spaced quadratically
+    in r, finest near the nucleus where the density changes fastest.
+
+    The node maxima are not a proven bound: a peak between nodes can exceed it. A candidate whose
+    density exceeds its cell's bound widens that cell to twice the candidate's density, and the
+    batch being sampled restarts, so the points returned by one call never mix proposals from two
+    different envelopes. An envelope may be shared between threads (see cached_envelope); its
+    counters and bounds are only changed under a lock.
+
+    Attributes:
+        quantum_numbers (list): The valid quantum numbers (n, l, m) of the superposition.
+        r_edges, theta_edges, phi_edges (NDArray[np.float64]): Cell boundaries.
+        cell_bound (NDArray[np.float64]): Density bound per cell, flattened in (r, theta, phi) order.
+        proposed, accepted (int): Candidates drawn and accepted so far.
+        violations (int): Candidates whose density exceeded their cell's bound (should stay ~0).
+        widenings (int): Times the bound was widened after a violation.
+    """
+
+    def __init__(self, quantum_numbers: list[tuple[int, int, int]], r_max: float | None = None, shells: int = 64,
+                 theta_bins: int = 32, phi_bins: int | None = None, refine: int = 3, safety: float = 1.25):
+        self.quantum_numbers = valid_quantum_numbers(quantum_numbers)
+        if not self.quantum_numbers:
+            raise ValueError("Cannot build an envelope without a valid orbital.")
+        if r_max is None:
+            r_max = radial_extent(self.quantum_numbers)
+        if phi_bins is None:
+            # A single orbital (or orbitals sharing m) has no phi dependence in |psi|^2
+            phi_bins = 1 if len({m for (_, _, m) in self.quantum_numbers}) == 1 else 12
+
+        self.r_edges = r_max * np.linspace(0.0, 1.0, shells + 1) ** 2
+        self.theta_edges = np.linspace(0.0, np.pi, theta_bins + 1)
+        self.phi_edges = np.linspace(0.0, 2 * np.pi, phi_bins + 1)
+
+        r = r_max * np.linspace(0.0, 1.0, shells * refine + 1) ** 2
+        theta = np.linspace(0.0, np.pi, theta_bins * refine + 1)
+        phi = np.linspace(0.0, 2 * np.pi, phi_bins * refine + 1) if phi_bins > 1 else np.zeros(1)
+
+        r_grid, theta_grid, phi_grid = np.meshgrid(r, theta, phi, indexing="ij")
+        values = density(r_grid.ravel(), theta_grid.ravel(), phi_grid.ravel(), self.quantum_numbers).reshape(r_grid.shape)
+
+        values = _cell_maxima(values, 0, refine)
+        values = _cell_maxima(values, 1, refine)
+        if phi_bins > 1:
+            values = _cell_maxima(values, 2, refine)
+        self.safety = safety
+
+        self._volume = ((np.diff(self.r_edges ** 3) / 3)[:, None, None] * (-np.diff(np.cos(self.theta_edges)))[None, :, None]
+                        * np.diff(self.phi_edges)[None, None, :]).ravel()
+        self._set_bound(safety * values.ravel())
+
+        self.proposed = 0
+        self.accepted = 0
+        self.violations = 0
+        self.widenings = 0
+        self._lock = threading.Lock()
+
+    def _set_bound(self, cell_bound: NDArray[np.float64]) -> None:
+        # Assign new arrays instead of updating in place, so a thread that read the old ones keeps a consistent set
+        mass = cell_bound * self._volume
+        self.mass = float(mass.sum())
+        self.cdf = np.cumsum(mass) / self.mass if self.mass > 0 else np.zeros_like(mass)
+        self.cell_bound = cell_bound
+
+    @property
+    def acceptance_rate(self) -> float:
+        """Share of the proposed candidates that were accepted so far (0.0 before any proposal)."""
+        return self.accepted / self.proposed if self.proposed else 0.0
+
+    def sample(self, num_points: int, block_size: int = 65536, max_blocks: int = 2000,
+               rng: np.random.Generator | None = None) -> NDArray[np.float64]:
+        """Sample Cartesian positions from the superposition density.
+
+        Args:
+            num_points (int): Target number of accepted points.
+            block_size (int): Number of candidates evaluated per block.
+            max_blocks (int): Maximum number of blocks drawn before giving up.
+            rng (np.random.Generator | None): Random generator, a fresh default_rng() if None.
+
+        Returns:
+            NDArray[np.float64]: Accepted positions of shape (<= num_points, 3), in Bohr radii.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+
+        positions: NDArray[np.float64] = np.zeros((num_points, 3))
+        if num_points <= 0 or self.mass <= 0.0:
+            return positions[:0]
+
+        num_theta = len(self.theta_edges) - 1
+        num_phi = len(self.phi_edges) - 1
+
+        num_accepted = 0
+        for _ in range(max_blocks):
+            with self._lock:
+                cell_bound, cdf = self.cell_bound, self.cdf
+
+            cell = np.minimum(np.searchsorted(cdf, rng.uniform(0.0, 1.0, block_size), side="right"), len(cdf) - 1)
+            i_r, rest = np.divmod(cell, num_theta * num_phi)
+            i_theta, i_phi = np.divmod(rest, num_phi)
+
+            # Uniform in volume inside the cell: r^3, cos(theta) and phi are uniform
+            r_low, r_high = self.r_edges[i_r] ** 3, self.r_edges[i_r + 1] ** 3
+            r = np.cbrt(r_low + rng.uniform(0.0, 1.0, block_size) * (r_high - r_low))
+            cos_low, cos_high = np.cos(self.theta_edges[i_theta + 1]), np.cos(self.theta_edges[i_theta])
+            theta = np.arccos(cos_low + rng.uniform(0.0, 1.0, block_size) * (cos_high - cos_low))
+            phi = self.phi_edges[i_phi] + rng.uniform(0.0, 1.0, block_size) * (self.phi_edges[1] - self.phi_edges[0])
+
+            values = density(r, theta, phi, self.quantum_numbers)
+            bound = cell_bound[cell]
+            accepted = rng.uniform(0.0, 1.0, block_size) * bound <= values
+            violated = values > bound
+
+            with self._lock:
+                self.proposed += block_size
+                self.accepted += int(np.count_nonzero(accepted))
+                self.violations += int(np.count_nonzero(violated))
+
+                if np.any(violated):
+                    # Cells whose bound was too low were under-proposed: widen them and restart the batch
+                    widened = self.cell_bound.copy()
+                    np.maximum.at(widened, cell[violated], 2.0 * values[violated])
+                    self._set_bound(widened)
+                    self.widenings += 1
+
+            if np.any(violated):
+                num_accepted = 0
+                continue
+
+            take = min(int(np.count_nonzero(accepted)), num_points - num_accepted)
+            r, theta, phi = r[accepted][:take], theta[accepted][:take], phi[accepted][:take]
+
+            positions[num_accepted:num_accepted + take] = spherical_to_cartesian_points(r, theta, phi)
+
+            num_accepted += take
+            if num_accepted >= num_points:
+                break
+
+        return positions[:num_accepted]
+
+@lru_cache(maxsize=16)
+def cached_envelope(quantum_numbers: tuple[tuple[int, int, int], ...], r_max: float | None = None) -> Envelope:
+    """Build (or reuse) the Envelope of a superposition; its counters accumulate across calls.
+
+    The envelope is shared by the game thread and the background sampler; Envelope.sample is safe
+    to call from both at once.
+
+    Args:
+        quantum_numbers (tuple): Tuple of (n, l, m) tuples, hashable so the envelope can be cached.
+        r_max (float | None): Radius of the sampled region in Bohr radii, estimated from n if None.
+
+    Returns:
+        Envelope: The shared envelope.
+    """
+    return Envelope(list(quantum_numbers), r_max)
+
+def _trapezoid(grid: NDArray[np.float64], pdf: NDArray[np.float64]) -> float:
+    """Integrate a tabulated function with the trapezoid rule."""
+    return float(np.sum(0.5 * (pdf[1:] + pdf[:-1]) * np.diff(grid)))
+
+def _tabulate_cdf(grid: NDArray[np.float64], pdf: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Integrate a tabulated pdf with the trapezoid rule into a normalized CDF."""
+    cdf = np.concatenate(([0.0], np.cumsum(0.5 * (pdf[1:] + pdf[:-1]) * np.diff(grid))))
+    return cdf / cdf[-1]
+
+@lru_cache(maxsize=64)
+def inverse_cdf_tables(n: int, l: int, m: int, r_max: float) -> tuple[NDArray[np.float64], NDArray[np.float64],
+                                                                       NDArray[np.float64], NDArray[np.float64]]:
+    """Tabulate the radial and polar CDFs of a single orbital.
+
+    |psi|^2 r^2 sin(theta) factors into r^2 R_nl(r)^2 and sin(theta) |Y_lm(theta)|^2,
+    while phi only enters through a unit-modulus phase, so both tables are one-dimensional.
+
+    Args:
+        n (int): Principal quantum number.
+        l (int): Azimuthal quantum number.
+        m (int): Magnetic quantum number.
+        r_max (float): Outer radius of the radial table in Bohr radii.
+
+    Returns:
+        tuple: (r_grid, r_cdf, theta_grid, theta_cdf).
+    """
+    r_grid = np.linspace(0.0, r_max, radial_table_size)
+    r_pdf = r_grid ** 2 * radial_wavefunction(r_grid * a, n, l) ** 2
+
+    theta_grid = np.linspace(0.0, np.pi, theta_table_size)
+    theta_pdf = np.sin(theta_grid) * np.abs(spherical_harmonic(theta_grid, np.zeros_like(theta_grid), l, m)) ** 2
+
+    return r_grid, _tabulate_cdf(r_grid, r_pdf), theta_grid, _tabulate_cdf(theta_grid, theta_pdf)
+
+@lru_cache(maxsize=64)
+def orbital_norm(n: int, l: int, m: int, r_max: float | None = None) -> float:
+    """Integrate |psi|^2 of a single orbital over a ball, with volume measured in cubic Bohr radii.
+
+    The wavefunctions are not equally normalized in these units, so the share of each orbital in a
+    superposition (and in a mixture of its orbitals) is proportional to this norm.
+
+    Args:
+        n (int): Principal quantum number.
+        l (int): Azimuthal quantum number.
+        m (int): Magnetic quantum number.
+        r_max (float | None): Radius of the ball in Bohr radii, the inverse-CDF table radius if None.
+
+    Returns:
+        float: The integral of |psi|^2 over the ball.
+    """
+    if r_max is None:
+        r_max = radial_extent([(n, l, m)])
+
+    r_grid = np.linspace(0.0, r_max, radial_table_size)
+    theta_grid = np.linspace(0.0, np.pi, theta_table_size)
+    r_pdf = r_grid ** 2 * radial_wavefunction(r_grid * a, n, l) ** 2
+    theta_pdf = np.sin(theta_grid) * np.abs(spherical_harmonic(theta_grid, np.zeros_like(theta_grid), l, m)) ** 2
+    return 2 * np.pi * _trapezoid(r_grid, r_pdf) * _trapezoid(theta_grid, theta_pdf)
+
+def _invert_cdf(u: NDArray[np.float64], grid: NDArray[np.float64], cdf: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Map uniform variates through a tabulated CDF, interpolating linearly inside each bin."""
+    upper = np.clip(np.searchsorted(cdf, u, side="right"), 1, len(cdf) - 1)
+    lower = upper - 1
+    width = cdf[upper] - cdf[lower]
+    fraction = np.divide(u - cdf[lower], width, out=np.zeros_like(u), where=width > 0)
+    return grid[lower] + fraction * (grid[upper] - grid[lower])
+
+def inverse_cdf_sample(n: int, l: int, m: int, num_points: int, r_max: float | None = None,
+                       rng: np.random.Generator | None = None) -> NDArray[np.float64]:
+    """Sample Cartesian positions of a single orbital exactly, without a rejection step.
+
+    Args:
+        n (int): Principal quantum number.
+        l (int): Azimuthal quantum number.
+        m (int): Magnetic quantum number.
+        num_points (int): Number of points to draw.
+        r_max (float | None): Outer radius of the radial table in Bohr radii, estimated from n if None.
+        rng (np.random.Generator | None): Random generator, a fresh default_rng() if None.
+
+    Returns:
+        NDArray[np.float64]: Positions of shape (num_points, 3), in Bohr radii.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if r_max is None:
+        r_max = radial_extent([(n, l, m)])
+
+    r_grid, r_cdf, theta_grid, theta_cdf = inverse_cdf_tables(n, l, m, float(r_max))
+
+    r = _invert_cdf(rng.uniform(0.0, 1.0, num_points), r_grid, r_cdf)
+    theta = _invert_cdf(rng.uniform(0.0, 1.0, num_points), theta_grid, theta_cdf)
+    phi = rng.uniform(0.0, 2 * np.pi, num_points)
+
+    return spherical_to_cartesian_points(r, theta, phi)
+
+def single_orbital(quantum_numbers: list[tuple[int, int, int]]) -> tuple[int, int, int] | None:
+    """Return the only distinct valid orbital of the list, or None for a true superposition.
+
+    Args:
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+
+    Returns:
+        tuple[int, int, int] | None: The (n, l, m) eigenstate, if the list describes one.
+    """
+    distinct = set(valid_quantum_numbers(quantum_numbers))
+    return next(iter(distinct)) if len(distinct) == 1 else None
+
+def sample_orbital(quantum_numbers: list[tuple[int, int, int]], num_points: int, mode: str = INVERSE_CDF,
+                   r_max: float | None = None, block_size: int = 65536, max_blocks: int = 2000,
+                   rng: np.random.Generator | None = None) -> NDArray[np.float64]:
+    """Sample Cartesian positions from the superposition density with the requested mode.
+
+    The inverse-CDF mode is only exact for a single eigenstate, so true superpositions
+    (more than one distinct valid orbital) fall back to envelope rejection sampling.
+    REJECTION keeps the original single global bound.
+
+    Args:
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+        num_points (int): Target number of points.
+        mode (str): INVERSE_CDF, ENVELOPE or REJECTION.
+        r_max (float | None): Radius of the sampled region in Bohr radii, estimated from n if None.
+        block_size (int): Number of candidates per block for rejection sampling.
+        max_blocks (int): Maximum number of blocks for rejection sampling.
+        rng (np.random.Generator | None): Random generator, a fresh default_rng() if None.
+
+    Returns:
+        NDArray[np.float64]: Positions of shape (<= num_points, 3), in Bohr radii.
+    """
+    if mode not in (REJECTION, INVERSE_CDF, ENVELOPE):
+        raise ValueError(f"Unknown sampling mode: {mode}")
+
+    orbital = single_orbital(quantum_numbers)
+
+    if mode == INVERSE_CDF and orbital is not None:
+        n, l, m = orbital
+        return inverse_cdf_sample(n, l, m, num_points, r_max=r_max, rng=rng)
+
+    if mode == REJECTION:
+        return rejection_sample(quantum_numbers, num_points, r_max=r_max, block_size=block_size,
+                                max_blocks=max_blocks, rng=rng)
+
+    quantum_numbers = valid_quantum_numbers(quantum_numbers)
+    if not quantum_numbers:
+        return np.zeros((0, 3))
+
+    return cached_envelope(tuple(quantum_numbers), r_max).sample(num_points, block_size=block_size,
+                                                                 max_blocks=max_blocks, rng=rng)
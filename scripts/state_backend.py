@@ -0,0 +1,253 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from numpy.typing import NDArray
+from scripts.quantum_state import (apply_gate_to_qubits, measure_qubits, measurement_cdf, num_qubits, qubit_marginals,
+                                   sample_outcomes)
+
+'''
+Interchangeable state-vector storage.
+DenseBackend keeps all 2^n amplitudes; SparseBackend keeps only the non-zero ones as parallel
+arrays of basis indices and amplitudes, which makes basis and GHZ-like states of dozens of qubits
+cheap. select_backend switches between them by fill ratio (share of non-zero amplitudes).
+The shared store keeps the backend itself, so the controllers read it through this interface
+(amplitude, marginals, outcomes, measure) instead of a dense array.
+'''
+
+class StateBackend(ABC):
+    """Common interface of the state-vector backends.
+
+    len() is the dimension 2^n, so num_qubits() accepts a backend as well as an array.
+
+    Attributes:
+        n (int): Number of qubits.
+    """
+    n: int
+
+    def __len__(self) -> int:
+        return 2 ** self.n
+
+    @abstractmethod
+    def apply_gate(self, gate: NDArray[np.complex128], qubits: list[int]) -> "StateBackend":
+        """Apply a k-qubit gate (first target most significant) and return the new state."""
+
+    @abstractmethod
+    def fill_ratio(self) -> float:
+        """Share of the 2^n amplitudes that are non-zero."""
+
+    @abstractmethod
+    def marginals(self) -> NDArray[np.float64]:
+        """Probability of measuring |1> on every qubit, as qubit_marginals."""
+
+    @abstractmethod
+    def to_dense(self) -> NDArray[np.complex128]:
+        """The full state vector of length 2^n."""
+
+    @abstractmethod
+    def amplitude(self, indices: NDArray[np.int64]) -> NDArray[np.complex128]:
+        """Amplitudes of the given basis indices (zero for those not stored)."""
+
+    @abstractmethod
+    def outcomes(self) -> tuple[NDArray[np.int64], NDArray[np.float64]]:
+        """Basis indices that can be measured and their cumulative distribution, for sample_outcomes."""
+
+    @abstractmethod
+    def measure(self, qubits: list[int], rng: np.random.Generator | None = None) -> tuple[int, "StateBackend"]:
+        """Measure some qubits and return (outcome with qubits[0] most significant, collapsed state), as measure_qubits."""
+
+    @abstractmethod
+    def collapse(self, index: int) -> "StateBackend":
+        """The basis state index, in the same backend."""
+
+class DenseBackend(StateBackend):
+    """All 2^n amplitudes in one array, updated by tensor contraction."""
+
+    def __init__(self, state_vector: NDArray[np.complex128], tolerance: float = 1e-12):
+        self.state_vector = state_vector
+        self.n = num_qubits(state_vector)
+        self.tolerance = tolerance
+
+    def apply_gate(self, gate: NDArray[np.complex128], qubits: list[int]) -> "DenseBackend":
+        return DenseBackend(apply_gate_to_qubits(self.state_vector, gate, qubits), self.tolerance)
+
+    def fill_ratio(self) -> float:
+        return np.count_nonzero(np.abs(self.state_vector) > self.tolerance) / len(self.state_vector)
+
+    def marginals(self) -> NDArray[np.float64]:
+        return qubit_marginals(self.state_vector)
+
+    def to_dense(self) -> NDArray[np.complex128]:
+        return self.state_vector
+
+    def amplitude(self, indices: NDArray[np.int64]) -> NDArray[np.complex128]:
+        return self.state_vector[indices]
+
+    def outcomes(self) -> tuple[NDArray[np.int64], NDArray[np.float64]]:
+        return np.arange(len(self.state_vector)), measurement_cdf(self.state_vector)
+
+    def measure(self, qubits: list[int], rng: np.random.Generator | None = None) -> tuple[int, "DenseBackend"]:
+        outcome, state_vector = measure_qubits(self.state_vector, qubits, rng)
+        return outcome, DenseBackend(state_vector, self.tolerance)
+
+    def collapse(self, index: int) -> "DenseBackend":
+        state_vector = np.zeros_like(self.state_vector)
+        state_vector[index] = 1.0
+        return DenseBackend(state_vector, self.tolerance)
+
+def _prune(indices: NDArray[np.int64], amplitudes: NDArray[np.complex128],
+           tolerance: float) -> tuple[NDArray[np.int64], NDArray[np.complex128], float]:
+    """Drop amplitudes at or below tolerance and rescale the rest to the original norm.
+
+    Returns:
+        tuple: (kept indices, rescaled amplitudes, dropped probability as a fraction of the norm).
+    """
+    probabilities = np.abs(amplitudes) ** 2
+    keep = probabilities > tolerance ** 2
+    total = float(np.sum(probabilities))
+    kept = float(np.sum(probabilities[keep]))
+
+    amplitudes = amplitudes[keep]
+    if 0.0 < kept < total:
+        amplitudes = amplitudes * np.sqrt(total / kept)
+    return indices[keep], amplitudes, (total - kept) / total if total > 0 else 0.0
+
+class SparseBackend(StateBackend):
+    """Non-zero amplitudes only, as parallel index and amplitude arrays (up to 62 qubits).
+
+    Attributes:
+        indices (NDArray[np.int64]): Distinct basis indices (qubit 0 is the most significant bit).
+        amplitudes (NDArray[np.complex128]): Amplitude of each index (real until a complex gate is applied).
+        tolerance (float): Amplitudes at or below this magnitude are dropped after each gate, and
+            the rest are rescaled so the norm is unchanged.
+        discarded (float): Total probability dropped by pruning so far, as a fraction of the norm.
+    """
+
+    def __init__(self, n: int, indices: NDArray[np.int64], amplitudes: NDArray[np.complex128],
+                 tolerance: float = 1e-12, discarded: float = 0.0):
+        if n > 62:
+            raise ValueError(f"{n} qubits do not fit in 64-bit basis indices.")
+        self.n = n
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.amplitudes = np.asarray(amplitudes, dtype=np.result_type(amplitudes, np.float64))
+        self.tolerance = tolerance
+        self.discarded = discarded
+
+    @classmethod
+    def from_dense(cls, state_vector: NDArray[np.complex128], tolerance: float = 1e-12) -> "SparseBackend":
+        indices, amplitudes, discarded = _prune(np.arange(len(state_vector)), state_vector, tolerance)
+        return cls(num_qubits(state_vector), indices, amplitudes, tolerance, discarded)
+
+    @classmethod
+    def basis_state(cls, n: int, index: int = 0) -> "SparseBackend":
+        return cls(n, np.array([index]), np.array([1.0]))
+
+    def _bit_shifts(self, qubits: list[int]) -> NDArray[np.int64]:
+        return self.n - 1 - np.asarray(qubits, dtype=np.int64)
+
+    def apply_gate(self, gate: NDArray[np.complex128], qubits: list[int]) -> "SparseBackend":
+        """Apply a k-qubit gate to the stored amplitudes only.
+
+        Amplitudes that differ only in the target bits form a group; each group is a length-2^k
+        vector that the gate maps to 2^k new amplitudes. Cost is O(nnz * 4^k), independent of 2^n.
+        """
+        k = len(qubits)
+
+        if len(set(qubits)) != k or any(q < 0 or q >= self.n for q in qubits):
+            raise IndexError(f"Invalid target qubits {qubits} for a {self.n}-qubit state.")
+        if gate.shape != (2 ** k, 2 ** k):
+            raise ValueError(f"Gate of shape {gate.shape} does not act on {k} qubits.")
+
+        shifts = self._bit_shifts(qubits)
+        weights = 1 << np.arange(k - 1, -1, -1, dtype=np.int64)  # First target is the most significant
+
+        sub = ((self.indices[:, None] >> shifts) & 1) @ weights
+        target_mask = int(np.sum(np.int64(1) << shifts))
+        bases, group = np.unique(self.indices & ~target_mask, return_inverse=True)
+
+        block = np.zeros((len(bases), 2 ** k), dtype=np.result_type(self.amplitudes, gate))
+        block[group.ravel(), sub] = self.amplitudes
+        block = block @ np.asarray(gate).T
+
+        # Basis index of output t within every group: scatter the bits of t to the target positions
+        outputs = ((np.arange(2 ** k)[:, None] >> np.arange(k - 1, -1, -1)) & 1) @ (np.int64(1) << shifts)
+        indices, amplitudes, discarded = _prune((bases[:, None] | outputs[None, :]).ravel(), block.ravel(),
+                                                self.tolerance)
+        return SparseBackend(self.n, indices, amplitudes, self.tolerance, self.discarded + discarded)
+
+    def fill_ratio(self) -> float:
+        return len(self.indices) / 2 ** self.n
+
+    def marginals(self) -> NDArray[np.float64]:
+        probabilities = np.abs(self.amplitudes) ** 2
+        total = probabilities.sum()
+        if total > 0:
+            probabilities = probabilities / total
+
+        bits = (self.indices[:, None] >> self._bit_shifts(list(range(self.n)))) & 1
+        return probabilities @ bits
+
+    def to_dense(self) -> NDArray[np.complex128]:
+        state_vector = np.zeros(2 ** self.n, dtype=self.amplitudes.dtype)
+        state_vector[self.indices] = self.amplitudes
+        return state_vector
+
+    def amplitude(self, indices: NDArray[np.int64]) -> NDArray[np.complex128]:
+        indices = np.asarray(indices, dtype=np.int64)
+        result = np.zeros(len(indices), dtype=self.amplitudes.dtype)
+        if len(self.indices) == 0:
+            return result
+
+        order = np.argsort(self.indices)
+        found = order[np.minimum(np.searchsorted(self.indices, indices, sorter=order), len(order) - 1)]
+        stored = self.indices[found] == indices
+        result[stored] = self.amplitudes[found[stored]]
+        return result
+
+    def outcomes(self) -> tuple[NDArray[np.int64], NDArray[np.float64]]:
+        return self.indices, measurement_cdf(self.amplitudes)
+
+    def measure(self, qubits: list[int], rng: np.random.Generator | None = None) -> tuple[int, "SparseBackend"]:
+        k = len(qubits)
+        if k == 0 or len(set(qubits)) != k or any(q < 0 or q >= self.n for q in qubits):
+            raise IndexError(f"Invalid measured qubits {qubits} for a {self.n}-qubit state.")
+
+        weights = 1 << np.arange(k - 1, -1, -1, dtype=np.int64)
+        observed = ((self.indices[:, None] >> self._bit_shifts(qubits)) & 1) @ weights
+        probabilities = np.bincount(observed, weights=np.abs(self.amplitudes) ** 2, minlength=2 ** k)
+        if probabilities.sum() <= 0:
+            raise ValueError("Cannot measure a zero state vector.")
+
+        outcome = int(sample_outcomes(np.cumsum(probabilities) / probabilities.sum(), 1, rng)[0])
+        keep = observed == outcome
+        return outcome, SparseBackend(self.n, self.indices[keep], self.amplitudes[keep] / np.sqrt(probabilities[outcome]),
+                                      self.tolerance, self.discarded)
+
+    def collapse(self, index: int) -> "SparseBackend":
+        return SparseBackend(self.n, np.array([index]), np.array([1.0]), self.tolerance)
+
+def as_backend(state: NDArray[np.complex128] | StateBackend) -> StateBackend:
+    """Wrap a plain state vector in a DenseBackend (without copying); backends pass through."""
+    return state if isinstance(state, StateBackend) else DenseBackend(state)
+
+def select_backend(backend: StateBackend, sparse_below: float = 0.05, dense_above: float = 0.25,
+                   max_dense_qubits: int = 24) -> StateBackend:
+    """Switch representation when the fill ratio crosses a threshold.
+
+    The two thresholds leave a band in which the current backend is kept, so a state hovering
+    around one value does not convert back and forth.
+
+    Args:
+        backend (StateBackend): The current state.
+        sparse_below (float): A dense state with a lower fill ratio becomes sparse.
+        dense_above (float): A sparse state with a higher fill ratio becomes dense...
+        max_dense_qubits (int): ...unless it has more qubits than this.
+
+    Returns:
+        StateBackend: The same state in the chosen backend.
+    """
+    if isinstance(backend, DenseBackend):
+        if backend.fill_ratio() < sparse_below:
+            return SparseBackend.from_dense(backend.state_vector, backend.tolerance)
+    elif isinstance(backend, SparseBackend):
+        if backend.n <= max_dense_qubits and backend.fill_ratio() > dense_above:
+            return DenseBackend(backend.to_dense(), backend.tolerance)
+    return backend
@@ -0,0 +1,212 @@
+import threading
+import numpy as np
+from numpy.typing import NDArray
+from scripts.wavefunction import a, hbar, m_e, guiding_equation_points
+from scripts.sampling import radial_extent, valid_quantum_numbers
+
+'''
+Bohmian velocity field of a saved orbital list.
+Positions are in Bohr radii and velocities in Bohr radii per atomic time unit (m_e a^2 / hbar).
+'''
+
+atomic_velocity = hbar / (m_e * a)  # One Bohr radius per atomic time unit, in m/s
+
+def spherical_to_cartesian_vectors(theta: NDArray[np.float64], phi: NDArray[np.float64], v_r: NDArray[np.float64],
+                                   v_theta: NDArray[np.float64], v_phi: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Convert spherical vector components to Cartesian components at the given angles.
+
+    Args:
+        theta, phi (NDArray[np.float64]): Polar and azimuthal angles of each point.
+        v_r, v_theta, v_phi (NDArray[np.float64]): Spherical vector components.
+
+    Returns:
+        NDArray[np.float64]: Cartesian vectors of shape (N, 3).
+    """
+    sin_theta, cos_theta = np.sin(theta), np.cos(theta)
+    sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+
+    v_rho = sin_theta * v_r + cos_theta * v_theta  # Cylindrical radial component
+    return np.stack((cos_phi * v_rho - sin_phi * v_phi,
+                     sin_phi * v_rho + cos_phi * v_phi,
+                     cos_theta * v_r - sin_theta * v_theta), axis=1)
+
+def point_velocities(points: NDArray[np.float64], quantum_numbers: list[tuple[int, int, int]]) -> NDArray[np.float64]:
+    """Evaluate the guiding-equation velocity directly at scattered points.
+
+    Args:
+        points (NDArray[np.float64]): Cartesian positions of shape (N, 3), in Bohr radii.
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+
+    Returns:
+        NDArray[np.float64]: Cartesian velocities of shape (N, 3), NaN where the density vanishes.
+    """
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+    theta = np.arccos(np.divide(z, r, out=np.ones_like(r), where=r > 0))
+    phi = np.arctan2(y, x)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v_r, v_theta, v_phi = guiding_equation_points(r * a, theta, phi, quantum_numbers)
+
+    return spherical_to_cartesian_vectors(theta, phi, v_r, v_theta, v_phi) / atomic_velocity
+
+class VelocityField:
+    """Velocity field of one orbital list, tabulated on a Cartesian grid.
+
+    The grid spans [-extent, extent]^3 with resolution nodes per axis. Nodes where the
+    density vanishes store a zero velocity.
+    """
+
+    def __init__(self, quantum_numbers: list[tuple[int, int, int]], resolution: int = 64,
+                 extent: float | None = None):
+        self.quantum_numbers = valid_quantum_numbers(quantum_numbers)
+        self.resolution = resolution
+        self.extent = extent if extent is not None else radial_extent(self.quantum_numbers)
+        self.spacing = 2 * self.extent / (resolution - 1)
+
+        axis = np.linspace(-self.extent, self.extent, resolution)
+        x, y, z = np.meshgrid(axis, axis, axis, indexing="ij")
+        nodes = np.stack((x.ravel(), y.ravel(), z.ravel()), axis=1)
+
+        if self.quantum_numbers:
+            velocities = np.nan_to_num(point_velocities(nodes, self.quantum_numbers), nan=0.0, posinf=0.0, neginf=0.0)
+        else:
+            velocities = np.zeros_like(nodes)
+        self.grid = velocities.reshape(resolution, resolution, resolution, 3)
+
+        # Flat node index of the 8 cell corners relative to the lower one, with their (x, y, z) bits
+        self._nodes = self.grid.reshape(-1, 3)
+        self._corners = [((dx * resolution + dy) * resolution + dz, dx, dy, dz)
+                         for dx in (0, 1) for dy in (0, 1) for dz in (0, 1)]
+
+    def lookup(self, points: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Interpolate velocities trilinearly at scattered points.
+
+        Points outside the grid are clamped to its boundary.
+
+        Args:
+            points (NDArray[np.float64]): Cartesian positions of shape (N, 3), in Bohr radii.
+
+        Returns:
+            NDArray[np.float64]: Cartesian velocities of shape (N, 3).
+        """
+        resolution = self.resolution
+        fraction = (points + self.extent) / self.spacing
+        np.clip(fraction, 0.0, resolution - 1, out=fraction)
+        lower = np.minimum(fraction.astype(np.intp), resolution - 2)
+        fraction -= lower
+
+        # One gather per cell corner from the flat node array, weighted by the trilinear basis
+        weights = ((1.0 - fraction[:, 0], fraction[:, 0]), (1.0 - fraction[:, 1], fraction[:, 1]),
+                   (1.0 - fraction[:, 2], fraction[:, 2]))
+        base = (lower[:, 0] * resolution + lower[:, 1]) * resolution + lower[:, 2]
+
+        velocities = np.zeros_like(points, dtype=np.float64)
+        for offset, dx, dy, dz in self._corners:
+            weight = weights[0][dx] * weights[1][dy]
+            weight *= weights[2][dz]
+            corner = np.take(self._nodes, base + offset, axis=0)
+            corner *= weight[:, None]
+            velocities += corner
+
+        return velocities
+
+    def interpolation_error(self, points: NDArray[np.float64] | None = None, num_points: int = 10000,
+                            rng: np.random.Generator | None = None) -> dict[str, float]:
+        """Compare the interpolated field against the direct evaluator.
+
+        Args:
+            points (NDArray[np.float64] | None): Positions to check, uniform in the grid if None.
+            num_points (int): Number of random positions drawn when points is None.
+            rng (np.random.Generator | None): Random generator, a fresh default_rng() if None.
+
+        Returns:
+            dict[str, float]: Mean and max absolute error, the RMS error relative to the RMS speed and
+            the median per-point relative error, over the points where the direct velocity is finite.
+        """
+        if points is None:
+            if rng is None:
+                rng = np.random.default_rng()
+            points = rng.uniform(-self.extent, self.extent, (num_points, 3))
+
+        direct = point_velocities(points, self.quantum_numbers)
+        finite = np.all(np.isfinite(direct), axis=1)
+        error = np.linalg.norm(self.lookup(points[finite]) - direct[finite], axis=1)
+        speed = np.linalg.norm(direct[finite], axis=1)
+
+        if len(error) == 0:
+            return {"mean": 0.0, "max": 0.0, "relative_rms": 0.0, "median_relative": 0.0}
+
+        return {
+            "mean": float(np.mean(error)),
+            "max": float(np.max(error)),
+            "relative_rms": float(np.sqrt(np.mean(error ** 2)) / max(np.sqrt(np.mean(speed ** 2)), 1e-300)),
+            "median_relative": float(np.median(error / np.maximum(speed, 1e-300)))
+        }
+
+class VelocityFieldCache:
+    """Keeps the velocity field of the most recent orbital list, rebuilding it on a worker thread.
+
+    Tabulating a 64^3 grid takes a few hundred milliseconds, so a changed orbital list starts a
+    build in the background and get() returns None until it is ready; the caller evaluates the
+    velocities point-wise in the meantime.
+    """
+
+    def __init__(self, resolution: int = 64):
+        self.resolution = resolution
+        self.field: VelocityField | None = None
+        self.error: BaseException | None = None
+        self._building: tuple[tuple[int, int, int], ...] | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def get(self, quantum_numbers: list[tuple[int, int, int]], block: bool = False) -> VelocityField | None:
+        """Return the field for quantum_numbers if it is built, starting a build if the orbital list changed.
+
+        Args:
+            quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+            block (bool): Wait for the build to finish instead of returning None.
+
+        Returns:
+            VelocityField | None: Tabulated velocity field, or None while it is being built or if building failed.
+
+        Raises:
+            BaseException: The build's exception, once, on the first call after it failed.
+        """
+        key = tuple(valid_quantum_numbers(quantum_numbers))
+
+        with self._lock:
+            field = self.field
+            if field is not None and tuple(field.quantum_numbers) == key and field.resolution == self.resolution:
+                return field
+
+            if self.error is not None:
+                error, self.error = self.error, None
+                raise error
+
+            if self._building != key:
+                self._building = key
+                self._thread = threading.Thread(target=self._build, args=(key, self.resolution), daemon=True)
+                self._thread.start()
+            thread = self._thread
+
+        if not block:
+            return None
+
+        thread.join()
+        with self._lock:
+            field = self.field
+        return field if field is not None and tuple(field.quantum_numbers) == key else None
+
+    def _build(self, key: tuple[tuple[int, int, int], ...], resolution: int) -> None:
+        try:
+            field = VelocityField(list(key), resolution)
+        except BaseException as error:
+            with self._lock:
+                if self._building == key:
+                    self.error = error
+            return
+
+        with self._lock:
+            if self._building == key:  # A newer list may have been requested meanwhile
+                self.field = field
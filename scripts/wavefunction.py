@@ -1,16 +1,152 @@
 import numpy as np
 import math
-from scipy.special import genlaguerre, sph_harm_y
+from collections import OrderedDict
+from typing import Callable, Generic, TypeVar
 from numpy.typing import NDArray
 
 a = 5.29177210903e-11  # Bohr Radius in meters
 hbar = 1.054571817e-34  # Reduced Planck's constant in J·s
 m_e = 9.10938356e-31  # Electron mass in kg
 
+T = TypeVar("T")
+
 '''
 For hydrogen-like atomic orbitals!
 '''
 
+class RadialCoefficients:
+    """Prepared constants of the radial function R_nl.
+
+    Attributes:
+        over_n (float): Radial scale 2 / (n * a).
+        radial_normalization (float): Normalization of the radial function.
+        laguerre (NDArray[np.float64]): Coefficients of L_{n-l-1}^{2l+1}, highest power first.
+        laguerre_derivative (NDArray[np.float64]): Coefficients of its first derivative.
+    """
+
+    def __init__(self, n: int, l: int):
+        self.n = n
+        self.l = l
+
+        # SciPy takes ~0.2 s to import, so it is only loaded when the first orbital is prepared
+        from scipy.special import genlaguerre
+
+        self.over_n = (2) / (n * a)
+        self.radial_normalization = math.sqrt(self.over_n * (math.factorial(n - l - 1) / (2 * n * (math.factorial(n + l)) ** 3)))
+        self.laguerre = np.asarray(genlaguerre(n - l - 1, 2 * l + 1).coeffs, dtype=np.float64)
+        self.laguerre_derivative = np.polyder(self.laguerre)
+
+class AngularCoefficients:
+    """Prepared constants of the spherical harmonic Y_l^m.
+
+    Attributes:
+        angular_normalization (float): Normalization of the spherical harmonic, including the Condon-Shortley phase.
+        legendre (NDArray[np.float64]): Coefficients of d^|m|/dx^|m| P_l(x), highest power first.
+        legendre_derivative (NDArray[np.float64]): Coefficients of its first derivative.
+    """
+
+    def __init__(self, l: int, m: int):
+        self.l = l
+        self.m = m
+
+        abs_m = abs(m)
+        # Y_l^{-|m|} = (-1)^|m| conj(Y_l^|m|), and Y_l^|m| carries the Condon-Shortley phase (-1)^|m|
+        phase = 1.0 if m < 0 else (-1.0) ** abs_m
+        self.angular_normalization = phase * math.sqrt(
+            (2 * l + 1) / (4 * math.pi) * math.factorial(l - abs_m) / math.factorial(l + abs_m)) if abs_m <= l else 0.0
+        legendre = np.polynomial.legendre.Legendre.basis(l).deriv(abs_m).convert(kind=np.polynomial.Polynomial).coef
+        self.legendre = np.asarray(legendre[::-1], dtype=np.float64)
+        self.legendre_derivative = np.polyder(self.legendre)
+
+class CoefficientCache(Generic[T]):
+    """Bounded LRU cache of prepared coefficients, keyed by the quantum numbers they depend on."""
+
+    def __init__(self, factory: Callable[..., T], maxsize: int = 64):
+        self.factory = factory
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[int, ...], T] = OrderedDict()
+
+    def get(self, *key: int) -> T:
+        """Return the coefficients for the given quantum numbers, preparing them on a miss.
+
+        Args:
+            *key (int): Quantum numbers passed to the factory, (n, l) or (l, m).
+
+        Returns:
+            T: Prepared constants.
+        """
+        coefficients = self._entries.get(key)
+
+        if coefficients is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return coefficients
+
+        self.misses += 1
+        coefficients = self.factory(*key)
+        self._entries[key] = coefficients
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+        return coefficients
+
+    def clear(self) -> None:
+        """Drop all cached entries and reset the hit/miss counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+radial_cache: CoefficientCache[RadialCoefficients] = CoefficientCache(RadialCoefficients)
+angular_cache: CoefficientCache[AngularCoefficients] = CoefficientCache(AngularCoefficients)
+
+def radial_wavefunction(r: NDArray[np.float64], n: int, l: int) -> NDArray[np.float64]:
+    """Calculate the radial part R_nl(r) of the hydrogen-like atomic orbital wavefunction.
+
+    Args:
+        r (NDArray[np.float64]): Radial distances from the nucleus.
+        n (int): Principal quantum number.
+        l (int): Azimuthal quantum number.
+
+    Returns:
+        NDArray[np.float64]: Value of the radial function at the given distances.
+    """
+    return _radial_component(r, radial_cache.get(n, l))
+
+def spherical_harmonic(theta: NDArray[np.float64], phi: NDArray[np.float64], l: int, m: int) -> NDArray[np.complex128]:
+    """Calculate the spherical harmonic Y_l^m(theta, phi) (same convention as scipy's sph_harm_y).
+
+    Args:
+        theta (NDArray[np.float64]): Polar angles (0 to pi).
+        phi (NDArray[np.float64]): Azimuthal angles (0 to 2pi).
+        l (int): Azimuthal quantum number.
+        m (int): Magnetic quantum number.
+
+    Returns:
+        NDArray[np.complex128]: Value of the spherical harmonic at the given angles.
+    """
+    return _angular_component(theta, phi, angular_cache.get(l, m))
+
+def _radial_component(r: NDArray[np.float64], coefficients: RadialCoefficients) -> NDArray[np.float64]:
+    rho = coefficients.over_n * r
+
+    exponential = np.exp(-rho / 2)
+
+    power = rho ** coefficients.l
+
+    return coefficients.radial_normalization * power * exponential * np.polyval(coefficients.laguerre, rho)
+
+def _angular_component(theta: NDArray[np.float64], phi: NDArray[np.float64], coefficients: AngularCoefficients) -> NDArray[np.complex128]:
+    m = coefficients.m
+
+    legendre = np.sin(theta) ** abs(m) * np.polyval(coefficients.legendre, np.cos(theta))
+
+    return coefficients.angular_normalization * legendre * np.exp(1j * m * np.asarray(phi))
+
 def wavefunction(r: NDArray[np.float64], theta: NDArray[np.float64], phi: NDArray[np.float64], n: int, l: int, m: int):
     """Calculate the hydrogen-like atomic orbital wavefunction value at given spherical coordinates.
 
@@ -25,23 +161,117 @@ def wavefunction(r: NDArray[np.float64], theta: NDArray[np.float64], phi: NDArra
     Returns:
         complex: Value of the wavefunction at the given coordinates.
     """
+    radial_component = _radial_component(r, radial_cache.get(n, l))
 
-    over_n = (2) / (n * a)
-
-    square_root = math.sqrt(over_n * (math.factorial(n - l - 1) / (2 * n * (math.factorial(n + l)) ** 3)))
-    
-    exponential = math.exp(-r / (n * a))
-
-    power = (over_n * r) ** l
+    angular_component = _angular_component(theta, phi, angular_cache.get(l, m))
 
-    L = genlaguerre(n - l - 1, 2 * l + 1)
-    # laguerre = laguerre_polynomial((2 * r) / (n * a), n, l)
+    return radial_component * angular_component
 
-    radial_component = square_root * power * exponential * L((2 * r) / (n * a))
+def _log_radial_normalization(n: int, l: int) -> float:
+    # log of RadialCoefficients.radial_normalization, finite for any n (the factorials overflow past n + l ~ 100)
+    return 0.5 * (math.log(2 / (n * a)) + math.lgamma(n - l) - math.log(2 * n) - 3 * math.lgamma(n + l + 1))
+
+def _laguerre_recurrence(rho: NDArray[np.float64], degree: int, alpha: int) -> NDArray[np.float64]:
+    # Three-term recurrence for L_degree^alpha(rho); stable where the expanded polynomial cancels
+    previous = np.ones_like(rho)
+    if degree == 0:
+        return previous
+    current = 1 + alpha - rho
+    for k in range(1, degree):
+        previous, current = current, ((2 * k + 1 + alpha - rho) * current - (k + alpha) * previous) / (k + 1)
+    return current
+
+def _normalized_legendre(cos_theta: NDArray[np.float64], sin_theta: NDArray[np.float64], abs_m: int,
+                         l_values: set[int]) -> dict[int, NDArray[np.float64]]:
+    # Normalized associated Legendre functions (Condon-Shortley phase included) for one |m|,
+    # climbing l from |m| so every requested l of that |m| comes out of the same recurrence
+    current = np.full_like(cos_theta, 1 / math.sqrt(4 * math.pi))
+    for k in range(1, abs_m + 1):
+        current = -math.sqrt((2 * k + 1) / (2 * k)) * sin_theta * current
+
+    values = {}
+    previous = np.zeros_like(cos_theta)
+    for l in range(abs_m, max(l_values) + 1):
+        if l > abs_m:
+            scale = math.sqrt((4 * l * l - 1) / (l * l - abs_m * abs_m))
+            lag = math.sqrt(((l - 1) ** 2 - abs_m * abs_m) / (4 * (l - 1) ** 2 - 1))
+            previous, current = current, scale * (cos_theta * current - lag * previous)
+        if l in l_values:
+            values[l] = current
+    return values
+
+def wavefunction_batch(r: NDArray[np.float64], theta: NDArray[np.float64], phi: NDArray[np.float64],
+                       quantum_numbers: list[tuple[int, int, int]]) -> NDArray[np.complex128]:
+    """Evaluate several hydrogen-like orbitals at once, sharing the work between them.
+
+    Same values and conventions as wavefunction(). Each distinct (n, l) evaluates its radial
+    function once (Laguerre recurrence, log-space normalization), each distinct |m| runs one
+    Legendre recurrence over all its l, and the trigonometric terms are computed once overall.
 
-    angular_component = sph_harm_y(l, m, theta, phi) # type: ignore
+    Args:
+        r (NDArray[np.float64]): Radial distances from the nucleus.
+        theta (NDArray[np.float64]): Polar angles (0 to pi).
+        phi (NDArray[np.float64]): Azimuthal angles (0 to 2pi).
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
 
-    return radial_component * angular_component
+    Returns:
+        NDArray[np.complex128]: Array of shape (len(quantum_numbers), *shape of the coordinates).
+    """
+    r, theta, phi = np.broadcast_arrays(np.asarray(r, dtype=np.float64), np.asarray(theta, dtype=np.float64),
+                                        np.asarray(phi, dtype=np.float64))
+    result = np.zeros((len(quantum_numbers),) + r.shape, dtype=np.complex128)
+    if not quantum_numbers:
+        return result
+
+    radial: dict[tuple[int, int], NDArray[np.float64]] = {}
+    with np.errstate(divide="ignore"):
+        for n in sorted({n for (n, _, _) in quantum_numbers}):
+            rho = (2 / (n * a)) * r
+            log_rho = np.log(rho)
+            for l in sorted({l for (n_, l, _) in quantum_numbers if n_ == n}):
+                log_envelope = _log_radial_normalization(n, l) - rho / 2
+                if l > 0:
+                    log_envelope = log_envelope + l * log_rho
+                radial[(n, l)] = np.exp(log_envelope) * _laguerre_recurrence(rho, n - l - 1, 2 * l + 1)
+
+    cos_theta = np.cos(theta)
+    sin_theta = np.sin(theta)
+    legendre: dict[tuple[int, int], NDArray[np.float64]] = {}
+    for abs_m in sorted({abs(m) for (_, _, m) in quantum_numbers}):
+        l_values = {l for (_, l, m) in quantum_numbers if abs(m) == abs_m and l >= abs_m}
+        if l_values:
+            for l, values in _normalized_legendre(cos_theta, sin_theta, abs_m, l_values).items():
+                legendre[(l, abs_m)] = values
+
+    # e^(i |m| phi) as powers of e^(i phi): one cos/sin pair instead of a complex exp per m
+    max_m = max(abs(m) for (_, l, m) in quantum_numbers)
+    powers = [np.ones_like(phi, dtype=np.complex128)]
+    if max_m > 0:
+        unit = np.empty_like(phi, dtype=np.complex128)
+        unit.real = np.cos(phi)
+        unit.imag = np.sin(phi)
+        for _ in range(max_m):
+            powers.append(powers[-1] * unit)
+
+    first_index: dict[tuple[int, int, int], int] = {}
+    for index, (n, l, m) in enumerate(quantum_numbers):
+        if abs(m) > l:
+            continue  # Y_l^m vanishes, as in wavefunction()
+        if (n, l, m) in first_index:
+            result[index] = result[first_index[(n, l, m)]]  # The same orbital saved twice
+            continue
+        first_index[(n, l, m)] = index
+
+        values = radial[(n, l)] * legendre[(l, abs(m))]
+        if m > 0:
+            result[index] = values * powers[m]
+        elif m < 0:
+            # Y_l^{-|m|} = (-1)^|m| conj(Y_l^|m|)
+            result[index] = (-1.0) ** m * values * np.conj(powers[-m])
+        else:
+            result[index] = values
+
+    return result
 
 # ...existing code...
 def guiding_equation(r: NDArray[np.float64], theta: NDArray[np.float64], phi: NDArray[np.float64],
@@ -132,13 +362,35 @@ def wavefunction_superposition_multiple(r: NDArray[np.float64], theta: NDArray[n
     Returns:
         complex: Combined wavefunction at the given coordinates.
     """
-    total_wavefunction = np.zeros_like(r, dtype=complex)  # Initialize with zeroes to sum the wavefunctions
-    
-    # Sum up the wavefunctions for each orbital
-    for (n, l, m) in quantum_numbers:
-        total_wavefunction += wavefunction(r, theta, phi, n, l, m)
-    
-    return total_wavefunction
+    # Sum up the wavefunctions for each orbital (evaluated together, see wavefunction_batch)
+    return wavefunction_batch(r, theta, phi, quantum_numbers).sum(axis=0)
+
+def probability_density(r: NDArray[np.float64], theta: NDArray[np.float64], phi: NDArray[np.float64],
+                        quantum_numbers: list[tuple[int, int, int]]) -> NDArray[np.float64]:
+    """Calculate the probability density |psi|^2 of a superposition of hydrogen-like orbitals.
+
+    Args:
+        r, theta, phi (NDArray[np.float64]): Radial and angular coordinates.
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+
+    Returns:
+        NDArray[np.float64]: Probability density at the given coordinates.
+    """
+    psi = wavefunction_superposition_multiple(r, theta, phi, quantum_numbers)
+    return psi.real ** 2 + psi.imag ** 2
+
+def is_valid_orbital(n: int, l: int, m: int) -> bool:
+    """Check whether (n, l, m) describes a physical hydrogen-like orbital.
+
+    Args:
+        n (int): Principal quantum number.
+        l (int): Azimuthal quantum number.
+        m (int): Magnetic quantum number.
+
+    Returns:
+        bool: True if n >= 1, 0 <= l < n and |m| <= l.
+    """
+    return n >= 1 and 0 <= l < n and abs(m) <= l
 
 def guiding_equation_superposition_multiple(r: NDArray[np.float64], theta: NDArray[np.float64], phi: NDArray[np.float64],
                                            quantum_numbers: list[tuple[int, int, int]]):
@@ -174,3 +426,97 @@ def guiding_equation_superposition_multiple(r: NDArray[np.float64], theta: NDArr
     v_phi = j_phi / safe_den
 
     return v_r, v_theta, v_phi
+
+def wavefunction_gradient(r: NDArray[np.float64], theta: NDArray[np.float64], phi: NDArray[np.float64],
+                          n: int, l: int, m: int) -> tuple[NDArray[np.complex128], NDArray[np.complex128],
+                                                           NDArray[np.complex128], NDArray[np.complex128]]:
+    """Calculate the wavefunction and its analytic partial derivatives at arbitrary points.
+
+    Args:
+        r (NDArray[np.float64]): Radial distances from the nucleus.
+        theta (NDArray[np.float64]): Polar angles (0 to pi).
+        phi (NDArray[np.float64]): Azimuthal angles (0 to 2pi).
+        n (int): Principal quantum number.
+        l (int): Azimuthal quantum number.
+        m (int): Magnetic quantum number.
+
+    Returns:
+        tuple: (psi, dpsi/dr, dpsi/dtheta, dpsi/dphi), each with the shape of r.
+    """
+    radial_coefficients = radial_cache.get(n, l)
+    angular_coefficients = angular_cache.get(l, m)
+    abs_m = abs(m)
+
+    # R = N rho^l e^(-rho/2) L(rho) with rho = over_n * r
+    rho = radial_coefficients.over_n * r
+    exponential = np.exp(-rho / 2)
+    laguerre = np.polyval(radial_coefficients.laguerre, rho)
+    d_laguerre = np.polyval(radial_coefficients.laguerre_derivative, rho)
+    power = rho ** l
+
+    radial = radial_coefficients.radial_normalization * power * exponential * laguerre
+    d_radial_terms = power * (d_laguerre - laguerre / 2)
+    if l > 0:
+        d_radial_terms = d_radial_terms + l * rho ** (l - 1) * laguerre
+    d_radial = radial_coefficients.over_n * radial_coefficients.radial_normalization * exponential * d_radial_terms
+
+    # Y = A sin^|m|(theta) P(cos(theta)) e^(i m phi) with P = d^|m| P_l / dx^|m|
+    sin_theta = np.sin(theta)
+    cos_theta = np.cos(theta)
+    phase = np.exp(1j * m * np.asarray(phi))
+    legendre = np.polyval(angular_coefficients.legendre, cos_theta)
+    d_legendre = np.polyval(angular_coefficients.legendre_derivative, cos_theta)
+
+    angular = angular_coefficients.angular_normalization * sin_theta ** abs_m * legendre * phase
+    d_angular_terms = -sin_theta ** (abs_m + 1) * d_legendre
+    if abs_m > 0:
+        d_angular_terms = d_angular_terms + abs_m * sin_theta ** (abs_m - 1) * cos_theta * legendre
+    d_angular = angular_coefficients.angular_normalization * d_angular_terms * phase
+
+    psi = radial * angular
+    return psi, d_radial * angular, radial * d_angular, 1j * m * psi
+
+def guiding_equation_points(r: NDArray[np.float64], theta: NDArray[np.float64], phi: NDArray[np.float64],
+                            quantum_numbers: list[tuple[int, int, int]]):
+    """Calculate the guiding-equation velocities of a superposition at scattered points.
+
+    Unlike guiding_equation_superposition_multiple, the derivatives are analytic, so r, theta
+    and phi may be arbitrary 1D particle coordinates rather than the axes of a structured grid.
+
+    Args:
+        r, theta, phi (NDArray[np.float64]): Radial and angular coordinates of each point.
+        quantum_numbers (list): List of tuples, each containing the quantum numbers (n, l, m) for an orbital.
+
+    Returns:
+        NDArray[np.float64]: Velocity components (v_r, v_theta, v_phi), each with the shape of r.
+    """
+    psi = np.zeros_like(r, dtype=complex)
+    dpsi_dr = np.zeros_like(r, dtype=complex)
+    dpsi_dtheta = np.zeros_like(r, dtype=complex)
+    dpsi_dphi = np.zeros_like(r, dtype=complex)
+
+    for (n, l, m) in quantum_numbers:
+        value, d_r, d_theta, d_phi = wavefunction_gradient(r, theta, phi, n, l, m)
+        psi += value
+        dpsi_dr += d_r
+        dpsi_dtheta += d_theta
+        dpsi_dphi += d_phi
+
+    psi_conj = np.conj(psi)
+
+    # Probability current components
+    j_r = (hbar / m_e) * np.imag(psi_conj * dpsi_dr)
+    j_theta = (hbar / m_e) * np.imag(psi_conj * dpsi_dtheta) / r
+    j_phi = (hbar / m_e) * np.imag(psi_conj * dpsi_dphi) / (r * np.sin(theta))
+
+    # Probability density
+    prob_density = np.abs(psi) ** 2
+    eps = 1e-20
+    safe_den = np.where(prob_density <= eps, np.nan, prob_density)  # to avoid division by zero
+
+    # Velocity components
+    v_r = j_r / safe_den
+    v_theta = j_theta / safe_den
+    v_phi = j_phi / safe_den
+
+    return v_r, v_theta, v_phi
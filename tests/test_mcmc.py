@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from scripts.mcmc import densities, has_converged, metropolis_sweep, metropolis_update, radial_moments, sample_mixture
+from scripts.sampling import ENVELOPE, inverse_cdf_sample, sample_orbital
+
+def mean_radius(n: int, l: int) -> float:
+    return (3 * n ** 2 - l * (l + 1)) / 2
+
+@pytest.mark.parametrize("orbital", [(2, 1, 0), (3, 2, 1), (4, 3, 2)])
+def test_sweeps_keep_an_exact_cloud_stationary(orbital):
+    rng = np.random.default_rng(1)
+    positions = inverse_cdf_sample(*orbital, 20000, rng=rng)
+    density, mixture = densities(positions, [orbital])
+
+    for _ in range(4):
+        positions, density, mixture, _, _ = metropolis_sweep(positions, density, mixture, [orbital], step_size=1.0,
+                                                             rng=rng)
+
+    assert radial_moments(positions)[0] == pytest.approx(mean_radius(*orbital[:2]), rel=0.03)
+
+def test_sample_mixture_weights_orbitals_by_norm():
+    rng = np.random.default_rng(2)
+    quantum_numbers = [(4, 3, 2), (1, 0, 0)]
+
+    # (1, 0, 0) carries almost all of the norm, so the mixture looks like it alone
+    points = sample_mixture(quantum_numbers, 20000, rng=rng)
+    assert radial_moments(points)[0] == pytest.approx(mean_radius(1, 0), rel=0.05)
+
+def test_update_reaches_an_appended_orbital():
+    rng = np.random.default_rng(3)
+    quantum_numbers = [(4, 3, 2), (1, 0, 0)]
+    old_cloud = inverse_cdf_sample(4, 3, 2, 20000, rng=rng)
+    reference = sample_orbital(quantum_numbers, 20000, mode=ENVELOPE, rng=rng)
+
+    assert not has_converged(old_cloud, reference)
+
+    positions, stats = metropolis_update(old_cloud, quantum_numbers, sweeps=8, rng=rng)
+    assert has_converged(positions, reference)
+    assert len(stats.jump_ratios) == 8
+
+def test_update_keeps_a_superposition_stationary():
+    rng = np.random.default_rng(4)
+    quantum_numbers = [(2, 1, 1), (3, 2, -1)]
+    reference = sample_orbital(quantum_numbers, 20000, mode=ENVELOPE, rng=rng)
+
+    positions, _ = metropolis_update(sample_orbital(quantum_numbers, 20000, mode=ENVELOPE, rng=rng), quantum_numbers,
+                                     sweeps=4, rng=rng)
+    assert has_converged(positions, reference, tolerance=0.03)
@@ -0,0 +1,58 @@
+import warnings
+import numpy as np
+import pytest
+from scripts.mcmc import radial_moments
+from scripts.orbital_library import OrbitalLibrary, build_library, reachable_orbitals
+
+@pytest.fixture(scope="module")
+def library_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("library") / "library.orbs")
+    build_library(path, points_per_orbital=4000, orbitals=[(1, 0, 0), (3, 2, 1)], seed=5)
+    return path
+
+def test_reachable_orbitals_are_valid_and_distinct():
+    orbitals = reachable_orbitals()
+    assert len(orbitals) == len(set(orbitals)) == 20
+    assert all(0 <= l < n and abs(m) <= l for (n, l, m) in orbitals)
+
+def test_lookup_returns_a_window_of_the_entry(library_path):
+    library = OrbitalLibrary(library_path)
+    points = library.get((3, 2, 1), 2000, rng=np.random.default_rng(0))
+
+    assert library.orbitals() == [(1, 0, 0), (3, 2, 1)]
+    assert points.shape == (2000, 3)
+    assert radial_moments(points)[0] == pytest.approx((3 * 9 - 6) / 2, rel=0.05)
+
+def test_same_seed_builds_the_same_archive(library_path, tmp_path):
+    other = str(tmp_path / "again.orbs")
+    build_library(other, points_per_orbital=4000, orbitals=[(1, 0, 0), (3, 2, 1)], seed=5)
+
+    with open(library_path, "rb") as first, open(other, "rb") as second:
+        assert first.read() == second.read()
+
+def test_missing_entry_returns_none_without_warning(library_path):
+    library = OrbitalLibrary(library_path)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert library.get((2, 1, 0), 100) is None
+
+def test_too_small_entry_warns_once(library_path):
+    library = OrbitalLibrary(library_path)
+
+    with pytest.warns(UserWarning, match="fewer than"):
+        assert library.get((1, 0, 0), 5000) is None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert library.get((1, 0, 0), 5000) is None
+
+def test_missing_archive_warns_once(tmp_path):
+    library = OrbitalLibrary(str(tmp_path / "missing.orbs"))
+
+    with pytest.warns(UserWarning, match="python -m scripts.orbital_library"):
+        assert library.get((1, 0, 0), 10) is None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert library.get((1, 0, 0), 10) is None
+        assert library.orbitals() == []
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from scripts.point_cloud import (FLOAT32, HEADER_SIZE, INT16, append_points, create_cloud, csv_to_cloud, open_cloud,
+                                 quantum_numbers_from_name, read_header, write_cloud)
+
+def chunks(count: int, size: int, scale: float = 5.0) -> list[np.ndarray]:
+    rng = np.random.default_rng(count)
+    return [rng.uniform(-scale, scale, (size, 3)) for _ in range(count)]
+
+def test_float32_round_trip(tmp_path):
+    path = str(tmp_path / "cloud.cloud")
+    data = chunks(3, 1000)
+
+    assert write_cloud(path, iter(data), [(2, 1, 0)], seed=7) == 3000
+
+    cloud = open_cloud(path)
+    assert cloud.encoding == FLOAT32
+    assert cloud.quantum_numbers == [(2, 1, 0)]
+    assert cloud.seed == 7
+    np.testing.assert_array_equal(cloud.points(), np.concatenate(data).astype(np.float32))
+    np.testing.assert_array_equal(cloud.points(1000, 1010), data[1][:10].astype(np.float32))
+
+def test_int16_round_trip_within_one_step(tmp_path):
+    path = str(tmp_path / "cloud.cloud")
+    data = np.concatenate(chunks(2, 1000))
+
+    write_cloud(path, [data], [(3, 2, 1)], quantized=True, extent=5.0)
+
+    cloud = open_cloud(path)
+    assert cloud.encoding == INT16
+    assert np.max(np.abs(cloud.points() - data)) <= cloud.step / 2 + 1e-6
+
+def test_int16_clipping_warns_with_a_count(tmp_path):
+    path = str(tmp_path / "cloud.cloud")
+    data = np.zeros((10, 3))
+    data[:3, 0] = 8.0
+
+    with pytest.warns(UserWarning, match="3 of 10 points"):
+        write_cloud(path, [data], [], quantized=True, extent=5.0)
+
+    assert np.max(open_cloud(path).points()) == pytest.approx(5.0)
+
+def test_append_adds_to_the_stored_points(tmp_path):
+    path = str(tmp_path / "cloud.cloud")
+    first, second = chunks(2, 500)
+
+    create_cloud(path, [(1, 0, 0)])
+    assert append_points(path, first) == 500
+    assert append_points(path, second) == 1000
+
+    np.testing.assert_array_equal(open_cloud(path).points(), np.concatenate([first, second]).astype(np.float32))
+
+def test_append_truncates_an_interrupted_append(tmp_path):
+    path = str(tmp_path / "cloud.cloud")
+    first, second = chunks(2, 500)
+    write_cloud(path, [first], [(1, 0, 0)])
+
+    # Points written without the header count, as an interrupted append leaves them
+    with open(path, "ab") as file:
+        file.write(b"\x00" * 100)
+    assert int(read_header(path)["count"]) == 500
+
+    append_points(path, second)
+
+    cloud = open_cloud(path)
+    assert len(cloud) == 1000
+    np.testing.assert_array_equal(cloud.points(500), second.astype(np.float32))
+    assert (tmp_path / "cloud.cloud").stat().st_size == HEADER_SIZE + 1000 * 3 * 4
+
+def test_csv_conversion_reads_the_orbital_from_the_name(tmp_path):
+    csv_path = tmp_path / "orbital_3,2,-1_full.csv"
+    data = chunks(1, 50)[0]
+    np.savetxt(csv_path, data, delimiter=",")
+
+    assert quantum_numbers_from_name(str(csv_path)) == [(3, 2, -1)]
+    assert csv_to_cloud(str(csv_path), str(tmp_path / "out.cloud"), chunk_rows=16) == 50
+    np.testing.assert_allclose(open_cloud(str(tmp_path / "out.cloud")).points(), data, rtol=1e-6)
+
+def test_rejects_a_file_that_is_not_a_cloud(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\x00" * 256)
+
+    with pytest.raises(ValueError):
+        read_header(str(path))
@@ -0,0 +1,42 @@
+import threading
+import numpy as np
+import pytest
+from scripts.mcmc import radial_moments
+from scripts.sampling import Envelope, inverse_cdf_sample
+
+def mean_radius(n: int, l: int) -> float:
+    return (3 * n ** 2 - l * (l + 1)) / 2
+
+@pytest.mark.parametrize("orbital", [(1, 0, 0), (2, 1, 1), (3, 2, 0), (4, 3, 2)])
+def test_inverse_cdf_matches_the_analytic_mean_radius(orbital):
+    points = inverse_cdf_sample(*orbital, 50000, rng=np.random.default_rng(1))
+    assert radial_moments(points)[0] == pytest.approx(mean_radius(*orbital[:2]), rel=0.02)
+
+@pytest.mark.parametrize("orbital", [(1, 0, 0), (2, 1, 1), (3, 2, 0), (4, 3, 2)])
+def test_envelope_matches_the_analytic_mean_radius(orbital):
+    envelope = Envelope([orbital])
+    points = envelope.sample(50000, rng=np.random.default_rng(2))
+
+    assert len(points) == 50000
+    assert radial_moments(points)[0] == pytest.approx(mean_radius(*orbital[:2]), rel=0.02)
+    assert envelope.violations == 0
+
+def test_envelope_widens_a_bound_that_is_too_low():
+    # A safety factor below 1 puts the bound under the density in every cell
+    envelope = Envelope([(3, 2, 0)], safety=0.6)
+    points = envelope.sample(20000, rng=np.random.default_rng(3))
+
+    assert len(points) == 20000
+    assert envelope.widenings > 0
+    assert radial_moments(points)[0] == pytest.approx(mean_radius(3, 2), rel=0.03)
+
+def test_envelope_counters_are_consistent_across_threads():
+    envelope = Envelope([(2, 1, 0)])
+    threads = [threading.Thread(target=envelope.sample, args=(20000,), kwargs={"block_size": 4096}) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert envelope.proposed % 4096 == 0
+    assert 4 * 20000 <= envelope.accepted <= envelope.proposed